@@ -0,0 +1,61 @@
+"""Micro-benchmarks of the pad I/O and model update paths.
+
+Run with `uv run python -m benchmarks`, see `-h` for options. Benchmarks
+are functions decorated with `benchmark` that do their setup and return
+the callable to time.
+"""
+
+import statistics
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from typing import NamedTuple
+
+_benchmarks = dict[str, Callable[[], Callable[[], object]]]()
+
+
+class Result(NamedTuple):
+    name: str
+    # Calls per timing run.
+    number: int
+    # Seconds per call, over all runs.
+    min: float
+    median: float
+    mean: float
+    stdev: float
+    # Memory a call leaves allocated, its result included.
+    bytes: int
+
+
+def benchmark(func: Callable[[], Callable[[], object]]):
+    _benchmarks[f'{func.__module__.rpartition(".")[2]}.{func.__name__}'] = func
+    return func
+
+
+def names() -> list[str]:
+    return sorted(_benchmarks)
+
+
+def run(name: str, repeat: int = 5, min_time: float = 0.2) -> Result:
+    """Times a benchmark, calling it often enough for each run to take `min_time`."""
+    func = _benchmarks[name]()
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    times = [t / number for t in timer.repeat(repeat, number)]
+    tracemalloc.start()
+    try:
+        result = func()  # noqa: F841, kept until measured
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Result(
+        name,
+        number,
+        min(times),
+        statistics.median(times),
+        statistics.mean(times),
+        statistics.stdev(times) if len(times) > 1 else 0.0,
+        size,
+    )
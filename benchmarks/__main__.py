@@ -0,0 +1,80 @@
+import argparse
+import datetime
+import json
+import platform
+import sys
+import tomllib
+from pathlib import Path
+
+from PySide6.QtCore import QCoreApplication
+
+import benchmarks
+from benchmarks import datatypes, model, pad, throttle, transport  # noqa: F401, registers the benchmarks
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks', description='Time the pad I/O and model update paths.'
+    )
+    parser.add_argument('-k', metavar='TEXT', help='only run benchmarks with TEXT in their name')
+    parser.add_argument('--list', action='store_true', help='list the benchmarks and exit')
+    parser.add_argument('--json', metavar='FILE', help="write the results as JSON, '-' for stdout")
+    parser.add_argument(
+        '--compare', metavar='FILE', help='show the change from results saved with --json'
+    )
+    parser.add_argument('--repeat', type=int, default=5, help='timing runs per benchmark')
+    parser.add_argument(
+        '--min-time', type=float, default=0.2, metavar='SECONDS', help='length of a timing run'
+    )
+    return parser.parse_args(argv)
+
+
+def _version() -> str:
+    with open(Path(__file__).parent.parent / 'pyproject.toml', 'rb') as f:
+        return tomllib.load(f)['project']['version']
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    names = [name for name in benchmarks.names() if args.k is None or args.k in name]
+    if args.list:
+        print(*names, sep='\n')
+        return 0
+
+    baseline = dict[str, float]()
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {r['name']: r['median'] for r in json.load(f)['results']}
+
+    # Some benchmarks create timers and signal connections.
+    app = QCoreApplication.instance() or QCoreApplication([])  # noqa: F841
+    out = sys.stderr if args.json == '-' else sys.stdout
+    results = list[benchmarks.Result]()
+    for name in names:
+        result = benchmarks.run(name, args.repeat, args.min_time)
+        results.append(result)
+        line = f'{name:<32} {1e6 * result.median:10.2f} µs  ±{1e6 * result.stdev:<6.2f}'
+        line += f' {result.bytes:8} B'
+        if name in baseline:
+            line += f'  {result.median / baseline[name]:6.2f}x'
+        print(line, file=out, flush=True)
+
+    if args.json:
+        data = {
+            'version': _version(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'date': datetime.datetime.now(datetime.UTC).isoformat(timespec='seconds'),
+            'unit': 'seconds',
+            'results': [result._asdict() for result in results],
+        }
+        if args.json == '-':
+            print(json.dumps(data, indent=2))
+        else:
+            with open(args.json, 'w') as f:
+                f.write(json.dumps(data, indent=2) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,69 @@
+"""Decoding readings and curves from pad responses, checked and trusted."""
+
+import itertools
+
+import protocol
+from benchmarks import benchmark
+from datatypes import Curve, CurveBand, CurvePoint, PanelId, Readings, ReadingsBatch
+
+
+def _response(command: protocol.Command, *values) -> bytes:
+    assert command.response is not None
+    return command.response.pack(*values).ljust(32, b'\x00')
+
+
+# What a poll gets back.
+_READINGS = [_response(protocol.READINGS, i % 2, 0.25, 0.75, 1000, 2000) for i in range(4)]
+# A curve with six points, reassembled from two packets.
+_CURVE = _response(protocol.CURVE, 0.025, 0.025, 6) + protocol.curve_points(6).pack(
+    -1.0, 0.5, -0.5, 0.25, 0.0, 0.5, 0.5, 0.75, 0.75, 0.5, 1.0, 0.5
+)
+
+
+@benchmark
+def readings_tuple():
+    # A Readings per panel, as polls were sent before ReadingsBatch.
+    def decode():
+        return tuple(
+            Readings(panel, pressed != 0, x, y, (left, right))
+            for panel, (pressed, x, y, left, right) in zip(
+                PanelId, (protocol.READINGS.unpack_from(r) for r in _READINGS)
+            )
+        )
+
+    return decode
+
+
+@benchmark
+def readings_batch():
+    def decode():
+        return ReadingsBatch.from_rows([protocol.READINGS.unpack_from(r) for r in _READINGS])
+
+    return decode
+
+
+def _coords() -> tuple[float, float, int, tuple[float, ...]]:
+    below, above, num_points = protocol.CURVE.unpack_from(_CURVE)
+    coords = protocol.curve_points(num_points).unpack_from(_CURVE, protocol.CURVE_POINTS_OFFSET)
+    return below, above, num_points, coords
+
+
+@benchmark
+def curve_checked():
+    # As curves were decoded before the trusted path.
+    def decode():
+        below, above, _, coords = _coords()
+        points = [CurvePoint(x, y) for x, y in itertools.batched(coords, n=2)]
+        return Curve(CurveBand(below, above), points)
+
+    return decode
+
+
+@benchmark
+def curve_trusted():
+    def decode():
+        below, above, _, coords = _coords()
+        points = tuple(map(CurvePoint.trusted, itertools.batched(coords, n=2)))
+        return Curve.trusted((CurveBand.trusted((below, above)), points))
+
+    return decode
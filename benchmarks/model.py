@@ -0,0 +1,61 @@
+"""Updates of the model from readings, with QML bindings stood in for."""
+
+import itertools
+
+from benchmarks import benchmark
+from datatypes import PanelId, Readings, ReadingsBatch
+from model import Model
+
+
+def _model() -> Model:
+    model = Model()
+    # Every notify signal gets one receiver, as with the QML bindings.
+    for panel in model.panels:
+        panel.readings_changed.connect(lambda: None)
+    return model
+
+
+def _batch(value: float) -> ReadingsBatch:
+    return ReadingsBatch.from_readings(
+        [Readings(panel, True, value, value, (1000, 2000)) for panel in PanelId]
+    )
+
+
+@benchmark
+def pad_readings():
+    model = _model()
+    readings = Readings(PanelId.Left, True, 0.25, 0.75, (1000, 2000))
+    return lambda: model.pad_readings(readings)
+
+
+@benchmark
+def pad_all_readings():
+    model = _model()
+    readings = _batch(0.25)
+    return lambda: model.pad_all_readings(readings)
+
+
+@benchmark
+def frame_moved():
+    # A poll and a frame in which every panel moved.
+    model = _model()
+    batches = itertools.cycle([_batch(0.25), _batch(0.75)])
+
+    def frame():
+        model.pad_all_readings(next(batches))
+        model.update_readings()
+
+    return frame
+
+
+@benchmark
+def frame_still():
+    # A poll and a frame in which nothing moved.
+    model = _model()
+    readings = _batch(0.25)
+
+    def frame():
+        model.pad_all_readings(readings)
+        model.update_readings()
+
+    return frame
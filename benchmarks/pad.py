@@ -0,0 +1,43 @@
+"""Pad requests against the emulator, encoding and decoding included."""
+
+from benchmarks import benchmark
+from datatypes import PanelId
+from emulator import Emulator
+from pad import Pad
+
+
+def _pad() -> Pad:
+    pad = Pad(transport=Emulator(seed=0), threaded=False)
+    pad.usb.connect()
+    return pad
+
+
+def _read(name: str, *args):
+    def func():
+        method = getattr(_pad(), name)
+        return lambda: method(*args)
+
+    func.__name__ = name
+    return benchmark(func)
+
+
+read_info = _read('read_info')
+read_alias = _read('read_alias')
+read_changes = _read('read_changes')
+read_hidmode = _read('read_hidmode')
+read_profile = _read('read_profile')
+read_curve = _read('read_curve', PanelId.Left)
+read_readings = _read('read_readings', PanelId.Left)
+read_all_readings = _read('read_all_readings')
+read_sensitivity = _read('read_sensitivity', PanelId.Left)
+read_band = _read('read_band', PanelId.Left)
+read_ranges = _read('read_ranges', PanelId.Left)
+read_panel_settings = _read('read_panel_settings')
+read_snapshot = _read('read_snapshot')
+
+
+@benchmark
+def refresh():
+    # What connecting reads, signals included.
+    pad = _pad()
+    return pad._refresh
@@ -0,0 +1,50 @@
+"""Collapsing of queued requests by the throttle."""
+
+from PySide6.QtCore import QObject, Slot
+
+from benchmarks import benchmark
+from util import Throttle, throttle_key
+
+
+class _Target(QObject):
+    @Slot(int, int)
+    @throttle_key(lambda key, _: key)
+    def set_value(self, key: int, value: int):
+        pass
+
+    @Slot()
+    def refresh(self):
+        pass
+
+
+@benchmark
+def process_queue_burst():
+    # A drag: many updates of one key, then a few others.
+    target = _Target()
+    throttle = Throttle(target)
+
+    def process():
+        for i in range(100):
+            throttle.set_value(0, i)
+        for key in range(1, 4):
+            throttle.set_value(key, 0)
+        for _ in range(3):
+            throttle.refresh()
+        throttle._process_queue()
+
+    return process
+
+
+@benchmark
+def process_queue_interleaved():
+    # Two panels dragged at once, which alternates the keys.
+    target = _Target()
+    throttle = Throttle(target)
+
+    def process():
+        for i in range(50):
+            throttle.set_value(0, i)
+            throttle.set_value(1, i)
+        throttle._process_queue()
+
+    return process
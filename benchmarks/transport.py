@@ -0,0 +1,42 @@
+"""Checksum and response framing."""
+
+import protocol
+import usb
+from benchmarks import benchmark
+from emulator import Emulator
+
+
+@benchmark
+def checksum():
+    packet = bytes(range(31))
+    return lambda: usb.Usb._checksum(packet)
+
+
+def _emulator() -> Emulator:
+    transport = Emulator(seed=0)
+    transport.connect()
+    return transport
+
+
+@benchmark
+def send():
+    transport = _emulator()
+    request = protocol.SENSITIVITY.pack(0)
+    return lambda: transport.send(request)
+
+
+@benchmark
+def send_multi_packet():
+    # Six points take two packets.
+    transport = _emulator()
+    for i in range(4):
+        transport.send(protocol.ADD_CURVE_POINT.pack(0, 1 + i, -0.5 + 0.25 * i, 0.5))
+    request = protocol.CURVE.pack(0)
+    return lambda: transport.send(request)
+
+
+@benchmark
+def send_many():
+    transport = _emulator()
+    requests = [protocol.READINGS.pack(panel) for panel in range(4)]
+    return lambda: transport.send_many(requests)
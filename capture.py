@@ -0,0 +1,235 @@
+"""Recording and replay of the packets exchanged with a pad.
+
+A capture file is a header followed by fixed-size records, one per 32-byte
+packet, each with the direction and a time.monotonic_ns() timestamp. LOST
+records mark the points where the responses to the outstanding requests
+were lost or flushed. Files are only ever appended to while recording and
+are read through mmap.
+"""
+
+import bisect
+import mmap
+import struct
+import time
+from collections import deque
+from collections.abc import Iterator
+from datetime import timedelta
+from typing import NamedTuple
+
+import crc
+import protocol
+import usb
+
+MAGIC = b'DCCAPTUR'
+VERSION = 2
+HEADER = struct.Struct('< 8s HH 4x')
+RECORD = struct.Struct('< Q B 7x 32s')
+
+OUT = 0
+IN = 1
+LOST = 2
+
+
+class Record(NamedTuple):
+    time_ns: int
+    direction: int
+    packet: bytes
+
+
+class Recorder:
+    """Appends packets to a capture file.
+
+    Writes are buffered and never synced, so recording can stay on for a
+    whole session. Callers serialise access through Transport.lock.
+    """
+
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, path: str):
+        # Stays open for the whole session, until close().
+        self._file = open(path, 'wb', buffering=self.BUFFER_SIZE)  # noqa: SIM115
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+    def record_out(self, packet: bytes):
+        self._file.write(RECORD.pack(time.monotonic_ns(), OUT, packet))
+
+    def record_in(self, packet: bytes):
+        self._file.write(RECORD.pack(time.monotonic_ns(), IN, packet))
+
+    def record_lost(self):
+        """Marks the requests recorded so far as no longer awaiting a response."""
+        self._file.write(RECORD.pack(time.monotonic_ns(), LOST, bytes(32)))
+
+    def close(self):
+        self._file.close()
+
+
+class Capture:
+    """Memory-mapped, read-only view of a capture file."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise ValueError(f'{path} is not a capture file')
+        magic, version, record_size = HEADER.unpack_from(self._map)
+        # Version 1 is the same without LOST records.
+        if magic != MAGIC or version not in (1, VERSION) or record_size != RECORD.size:
+            raise ValueError(f'{path} is not a capture file')
+        # Ignores a partial record left by a session that did not exit cleanly.
+        self._count = (len(self._map) - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index: int) -> Record:
+        if index < 0:
+            index += self._count
+        if index < 0 or index >= self._count:
+            raise IndexError('record index out of range')
+        return Record(*RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size))
+
+    def __iter__(self) -> Iterator[Record]:
+        for offset in range(HEADER.size, HEADER.size + self._count * RECORD.size, RECORD.size):
+            yield Record(*RECORD.unpack_from(self._map, offset))
+
+    def close(self):
+        self._map.close()
+
+
+class Replay(usb.Transport):
+    """Answers requests with the responses recorded in a capture.
+
+    The capture's timeline starts on connect and loops. A request gets the
+    response that was last recorded for an identical request at that point
+    of the timeline, or the first one if the timeline has not reached it yet.
+    Writes that were never recorded are acknowledged, other unknown requests
+    get an error response.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        # Request packet -> (timestamps, response packets), both sorted by time.
+        self._exchanges = dict[bytes, tuple[list[int], list[list[bytes]]]]()
+        self._responses = deque[bytes]()
+        self._connected = False
+        self._start = 0
+
+        capture = Capture(path)
+        try:
+            self._first = capture[0].time_ns if len(capture) else 0
+            self._duration = max(1, capture[-1].time_ns - self._first) if len(capture) else 1
+            self._index(capture)
+        finally:
+            capture.close()
+
+    def _index(self, capture: Capture):
+        # Responses follow their requests in order, possibly several requests
+        # later when requests were pipelined. Requests still pending at a
+        # LOST record never got theirs, and flushed responses are dropped.
+        pending = deque[tuple[Record, list[bytes]]]()
+        for record in capture:
+            if record.direction == OUT:
+                pending.append((record, []))
+                continue
+            if record.direction == LOST:
+                pending.clear()
+                continue
+            if not pending:
+                continue
+            request, packets = pending[0]
+            packets.append(record.packet)
+            first = packets[0]
+            if first[0] != 0x45 or len(packets) >= first[1]:
+                pending.popleft()
+                times, responses = self._exchanges.setdefault(request.packet, ([], []))
+                times.append(request.time_ns)
+                responses.append(packets)
+
+    def connect(self):
+        with self.lock:
+            self._connected = True
+            self._start = time.monotonic_ns()
+            self._responses.clear()
+
+    def disconnect(self):
+        with self.lock:
+            self._connected = False
+            self._responses.clear()
+
+    def bulk_write(self, data: bytes, timeout: timedelta | None = None) -> None:
+        if len(data) > 31:
+            raise usb.InvalidParamError('Request too long.')
+        if not self._connected:
+            raise usb.NoDeviceError('No pad connected.')
+        packet = _packet(data)
+        if self.recorder is not None:
+            self.recorder.record_out(packet)
+
+        exchange = self._exchanges.get(packet)
+        if exchange is not None:
+            times, responses = exchange
+            now = self._first + (time.monotonic_ns() - self._start) % self._duration
+            self._responses.extend(responses[max(0, bisect.bisect_right(times, now) - 1)])
+        elif data[0] in protocol.WRITE_OPCODES:
+            self._responses.append(_packet(b'\x41'))
+        else:
+            self._responses.append(_packet(b'\x4e'))
+
+    def bulk_read(self, timeout: timedelta | None = None) -> bytes:
+        if not self._connected:
+            raise usb.NoDeviceError('No pad connected.')
+        if not self._responses:
+            raise usb.TimeoutError('Transfer timed out.')
+        packet = self._responses.popleft()
+        if self.recorder is not None:
+            self.recorder.record_in(packet)
+        if packet[-1] != crc.checksum(packet[:-1]):
+            raise usb.ChecksumError('Checksum failure.')
+        return packet
+
+
+def _packet(data: bytes) -> bytes:
+    packet = bytearray(32)
+    packet[: len(data)] = data
+    packet[-1] = crc.checksum(packet[:-1])
+    return bytes(packet)
+
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+
+    # A capture where the request for panel 1 timed out and was never
+    # answered, so the flush before the next request found nothing.
+    requests = [protocol.SENSITIVITY.pack(panel) for panel in range(3)]
+    responses = [
+        _packet(b'\x41\x00' + (100 * (panel + 1)).to_bytes(2, 'little')) for panel in range(3)
+    ]
+    fd, path = tempfile.mkstemp(suffix='.cap')
+    os.close(fd)
+    try:
+        recorder = Recorder(path)
+        recorder.record_out(_packet(requests[0]))
+        recorder.record_in(responses[0])
+        recorder.record_out(_packet(requests[1]))
+        recorder.record_lost()
+        recorder.record_lost()
+        recorder.record_out(_packet(requests[2]))
+        recorder.record_in(responses[2])
+        recorder.close()
+
+        replay = Replay(path)
+        replay.connect()
+        for panel in (0, 2):
+            if replay.send(requests[panel]) != responses[panel]:
+                raise SystemExit(f'Wrong response replayed for panel {panel}.')
+        try:
+            replay.send(requests[1])
+        except usb.OtherError:
+            pass
+        else:
+            raise SystemExit('Response replayed for a request that timed out.')
+    finally:
+        os.remove(path)
+    print('Self-test passed.')
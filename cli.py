@@ -0,0 +1,313 @@
+"""Command line interface for scripting pads without the GUI.
+
+Only QtCore is loaded, and Pad runs without its thread, so startup costs
+little more than opening the device.
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections.abc import Sequence
+from enum import Enum
+
+import profiles
+import provision
+import usb
+from datatypes import (
+    Curve,
+    CurveBand,
+    HidMode,
+    PanelId,
+    ProfileId,
+    Sensitivity,
+    SensorRange,
+)
+from pad import Pad
+
+PER_PANEL = ('sensitivity', 'band', 'ranges', 'curve', 'readings')
+SETTINGS = ('alias', 'hidmode', 'profile', 'sensitivity', 'band', 'ranges')
+VALUES = ('serial', 'changes', 'curve', 'readings', *SETTINGS)
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='main.py --cli', description='Read and change pad settings without the GUI.'
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        '--device', type=_device_id, metavar='BUS:ADDRESS', help='use this pad, see devices'
+    )
+    source.add_argument('--replay', metavar='FILE', help='replay a capture made with --record')
+    source.add_argument('--emulate', action='store_true', help='use an emulated pad')
+    parser.add_argument('--record', metavar='FILE', help='record all packets to a capture file')
+    parser.add_argument(
+        '--metrics',
+        action='store_true',
+        help='print request counts, round-trip times and errors to standard error',
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    get = commands.add_parser('get', help='print a value')
+    get.add_argument('name', choices=VALUES)
+    get.add_argument('panel', nargs='?', help='panel, for per-panel values')
+
+    set_ = commands.add_parser('set', help='change a setting')
+    set_.add_argument('name', choices=SETTINGS)
+    set_.add_argument('value', nargs='+', help='panel first for per-panel settings')
+    set_.add_argument('--save', action='store_true', help='save the changes on the pad')
+
+    dump = commands.add_parser('dump', help='print the settings of the pad as JSON')
+    dump.add_argument('file', nargs='?', help='write to FILE instead')
+    dump.add_argument(
+        '--profile',
+        action='append',
+        choices=[profile.name for profile in ProfileId],
+        help='only dump PROFILE, can be repeated',
+    )
+
+    apply = commands.add_parser('apply', help='change settings to those in a dump')
+    apply.add_argument('file', help="dump to apply, '-' for standard input")
+    apply.add_argument('--save', action='store_true', help='save the changes on the pad')
+    apply.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='print the writes without sending, the pad switches profiles only to read them',
+    )
+    apply.add_argument('-v', '--verbose', action='store_true', help='print the writes sent')
+
+    commands.add_parser('devices', help='list connected pads')
+
+    provision = commands.add_parser('provision', help='apply a dump to all pads in parallel')
+    provision.add_argument('file', help="dump to apply, '-' for standard input")
+    provision.add_argument(
+        '--serial', type=int, action='append', help='only apply to this pad, can be repeated'
+    )
+    provision.add_argument('--save', action='store_true', help='save the changes on the pads')
+    provision.add_argument(
+        '--no-verify', action='store_true', help='do not read the settings back to check them'
+    )
+    commands.add_parser('save', help='save all changes on the pad')
+    commands.add_parser('revert', help='revert all unsaved changes')
+
+    stream = commands.add_parser('stream', help='print readings of all panels')
+    stream.add_argument('--rate', type=float, default=0.0, metavar='HZ', help='polling rate')
+    stream.add_argument('--count', type=int, default=0, help='stop after COUNT polls')
+
+    args = parser.parse_args(argv)
+    if args.command == 'set':
+        args.panel = args.value.pop(0) if args.name in PER_PANEL else None
+    if args.command in ('get', 'set'):
+        if args.name in PER_PANEL and args.panel is None:
+            parser.error(f'{args.name} needs a panel')
+        if args.name not in PER_PANEL and args.panel is not None:
+            parser.error(f'{args.name} is not per panel')
+        try:
+            args.panel = args.panel and _enum(PanelId, args.panel)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+
+def _device_id(text: str) -> usb.DeviceId:
+    try:
+        bus, address = text.split(':')
+        return usb.DeviceId(int(bus), int(address))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid device: {text}') from None
+
+
+def _enum[T: Enum](cls: type[T], name: str) -> T:
+    for value in cls:
+        if value.name.lower() == name.lower():
+            return value
+    raise ValueError(f'{name} is not one of {", ".join(v.name for v in cls)}')
+
+
+def get_value(pad: Pad, name: str, panel: PanelId | None):
+    match name:
+        case 'serial':
+            return pad.read_info()
+        case 'alias':
+            return pad.read_alias()
+        case 'changes':
+            return [c.name for c in pad.read_changes()]
+        case 'hidmode':
+            return pad.read_hidmode().name
+        case 'profile':
+            return pad.read_profile().name
+        case 'sensitivity':
+            return pad.read_sensitivity(panel).sensitivity
+        case 'band':
+            return pad.read_band(panel)._asdict()
+        case 'ranges':
+            return [r._asdict() for r in pad.read_ranges(panel)]
+        case 'curve':
+            return _curve_to_json(pad.read_curve(panel))
+        case 'readings':
+            return pad.read_readings(panel)._asdict() | {'panel': panel.name}
+
+
+def set_value(pad: Pad, name: str, panel: PanelId | None, value: list[str]):
+    match name, value:
+        case 'alias', _:
+            pad.write_alias(' '.join(value))
+        case 'hidmode', [mode]:
+            pad.write_hidmode(_enum(HidMode, mode))
+        case 'profile', [profile]:
+            pad.write_profile(_enum(ProfileId, profile))
+        case 'sensitivity', [sensitivity]:
+            pad.write_sensitivity(panel, Sensitivity(int(sensitivity)))
+        case 'band', [below, above]:
+            pad.write_band(panel, CurveBand(float(below), float(above)))
+        case 'ranges', [lmin, lmax, rmin, rmax]:
+            pad.write_ranges(
+                panel, (SensorRange(int(lmin), int(lmax)), SensorRange(int(rmin), int(rmax)))
+            )
+        case _:
+            raise ValueError(f'wrong number of values for {name}')
+
+
+def save(pad: Pad):
+    if changes := pad.read_changes():
+        pad.write_save_changes(changes)
+
+
+def stream(pad: Pad, rate: float, count: int):
+    period = 1.0 / rate if rate else 0.0
+    start = deadline = time.monotonic()
+    polls = 0
+    print('time', *(f'{p.name}.{v}' for p in PanelId for v in ('pressed', 'x', 'y', 'l', 'r')))
+    while not count or polls < count:
+        readings = pad.read_all_readings()
+        now = time.monotonic()
+        row = [f'{now - start:.4f}']
+        for r in readings:
+            row += [str(int(r.pressed)), f'{r.x:.4f}', f'{r.y:.4f}', *map(str, r.sensors)]
+        print(*row, flush=True)
+        polls += 1
+        if period:
+            deadline = max(deadline + period, now)
+            time.sleep(deadline - now)
+
+
+def list_devices():
+    for device_id in usb.enumerate_pads():
+        pad = Pad(transport=usb.Usb(device_id), threaded=False)
+        try:
+            pad.usb.connect()
+            print(device_id, pad.read_info(), pad.read_alias(), sep='\t')
+        except usb.Error as e:
+            print(device_id, f'error: {e}', sep='\t')
+        finally:
+            pad.usb.disconnect()
+
+
+def provision_all(path: str, serials: Sequence[int], save: bool, verify: bool) -> int:
+    try:
+        settings = profiles.from_json(_load_json(path))
+    except (ValueError, KeyError, OSError) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    results = provision.provision(settings, serials, save, verify)
+    for r in results:
+        status = 'ok' if r.error is None else f'error: {r.error}'
+        print(r.device_id, r.serial, f'{r.writes} writes', f'{r.seconds:.2f} s', status, sep='\t')
+    failed = sum(r.error is not None for r in results)
+    missing = set(serials) - {r.serial for r in results}
+    for serial in sorted(missing):
+        print(f'{serial} not found', file=sys.stderr)
+    print(
+        f'{len(results) - failed} of {len(results)} pads in {time.perf_counter() - start:.2f} s',
+        file=sys.stderr,
+    )
+    return 1 if failed or missing or not results else 0
+
+
+def _load_json(path: str):
+    if path == '-':
+        return json.load(sys.stdin)
+    with open(path) as f:
+        return json.load(f)
+
+
+def _curve_to_json(curve: Curve) -> dict:
+    # Same layout as in profiles.to_json.
+    return {
+        'band': [round(v, 6) for v in curve.band],
+        'points': [[round(p.x, 6), round(p.y, 6)] for p in curve.points],
+    }
+
+
+def _print(value):
+    if isinstance(value, (dict, list)):
+        print(json.dumps(value, indent=2))
+    else:
+        print(value)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    if args.command == 'devices':
+        list_devices()
+        return 0
+    if args.command == 'provision':
+        return provision_all(args.file, args.serial or (), args.save, not args.no_verify)
+
+    if args.replay:
+        from capture import Replay
+
+        pad = Pad(transport=Replay(args.replay), threaded=False)
+    elif args.emulate:
+        from emulator import Emulator
+
+        pad = Pad(transport=Emulator(), threaded=False)
+    else:
+        pad = Pad(transport=usb.Usb(args.device), threaded=False)
+    if args.record:
+        from capture import Recorder
+
+        pad.usb.recorder = Recorder(args.record)
+
+    try:
+        pad.usb.connect()
+        match args.command:
+            case 'get':
+                _print(get_value(pad, args.name, args.panel))
+            case 'set':
+                set_value(pad, args.name, args.panel, args.value)
+            case 'dump':
+                selected = [ProfileId[name] for name in args.profile or ProfileId._member_names_]
+                settings = profiles.read_settings(pad, selected)
+                text = json.dumps(profiles.to_json(settings), indent=2)
+                if args.file:
+                    with open(args.file, 'w') as f:
+                        f.write(text + '\n')
+                else:
+                    print(text)
+            case 'apply':
+                settings = profiles.from_json(_load_json(args.file))
+                writes = profiles.apply_settings(pad, settings, args.dry_run)
+                if args.verbose or args.dry_run:
+                    print(*writes, sep='\n')
+            case 'save':
+                save(pad)
+            case 'revert':
+                if changes := pad.read_changes():
+                    pad.write_revert_changes(changes)
+            case 'stream':
+                stream(pad, args.rate, args.count)
+        if getattr(args, 'save', False) and not getattr(args, 'dry_run', False):
+            save(pad)
+    except (usb.Error, ValueError, KeyError, OSError) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        pad.quit()
+        pad.usb.disconnect()
+        if args.metrics:
+            print(json.dumps(pad.usb.metrics.snapshot(), indent=2), file=sys.stderr)
+    return 0
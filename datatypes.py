@@ -1,6 +1,7 @@
 import math
+from array import array
 from enum import Enum, Flag
-from typing import NamedTuple, Sequence
+from typing import Iterable, Iterator, NamedTuple, Self, Sequence
 
 
 class Changes(Flag):
@@ -29,12 +30,23 @@ class ProfileId(Enum):
     Profile4 = 3
 
 
+class _Trusted:
+    __slots__ = ()
+
+    @classmethod
+    def trusted(cls, values: Iterable) -> Self:
+        """Builds a value without checking it, for data decoded from the pad."""
+        return tuple.__new__(cls, values)  # pyright: ignore[reportArgumentType]
+
+
 class _CurveBand(NamedTuple):
     below: float
     above: float
 
 
-class CurveBand(_CurveBand):
+class CurveBand(_Trusted, _CurveBand):
+    __slots__ = ()
+
     def __new__(cls, below: float, above: float):
         if not math.isfinite(below) or below < 0 or below > 0.15:
             raise ValueError('below must be in [0.00, 0.15]')
@@ -48,7 +60,9 @@ class _CurvePoint(NamedTuple):
     y: float
 
 
-class CurvePoint(_CurvePoint):
+class CurvePoint(_Trusted, _CurvePoint):
+    __slots__ = ()
+
     def __new__(cls, x: float, y: float):
         if not math.isfinite(x) or x < -1 or x > 1:
             raise ValueError('x must be in [-1, 1]')
@@ -62,7 +76,9 @@ class _Curve(NamedTuple):
     points: Sequence[CurvePoint]
 
 
-class Curve(_Curve):
+class Curve(_Trusted, _Curve):
+    __slots__ = ()
+
     def __new__(cls, band: CurveBand, points: Sequence[CurvePoint]):
         if len(points) < 2 or len(points) > 10:
             raise ValueError('must have 2 to 10 points')
@@ -81,12 +97,62 @@ class Readings(NamedTuple):
     sensors: tuple[int, int]
 
 
+class ReadingsBatch:
+    """Readings of several panels, stored column by column.
+
+    Entry i is of panel i % 4. Building one per poll is cheaper than a
+    Readings per panel, and the numbers stay unboxed until read.
+    Iterating gives Readings.
+    """
+
+    __slots__ = ('left', 'pressed', 'right', 'x', 'y')
+
+    def __init__(self, pressed: array, x: array, y: array, left: array, right: array):
+        self.pressed = pressed
+        self.x = x
+        self.y = y
+        self.left = left
+        self.right = right
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple[int, float, float, int, int]]) -> Self:
+        """Builds a batch from (pressed, x, y, left, right) rows, panel by panel."""
+        pressed, x, y, left, right = zip(*rows)
+        return cls(
+            array('B', pressed), array('f', x), array('f', y), array('H', left), array('H', right)
+        )
+
+    @classmethod
+    def from_readings(cls, readings: Iterable[Readings]) -> Self:
+        return cls.from_rows([(r.pressed, r.x, r.y, *r.sensors) for r in readings])
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, i: int) -> Readings:
+        return Readings(
+            _PANELS[i % len(_PANELS)],
+            self.pressed[i] != 0,
+            self.x[i],
+            self.y[i],
+            (self.left[i], self.right[i]),
+        )
+
+    def __iter__(self) -> Iterator[Readings]:
+        return map(self.__getitem__, range(len(self)))
+
+
+_PANELS = tuple(PanelId)
+
+
 class _SensorRange(NamedTuple):
     min: int
     max: int
 
 
-class SensorRange(_SensorRange):
+class SensorRange(_Trusted, _SensorRange):
+    __slots__ = ()
+
     def __new__(cls, min: int, max: int):
         if min < 0 or min > 4095 or min + 48 > max:
             raise ValueError('min must be in [0, max - 48]')
@@ -99,8 +165,36 @@ class _Sensitivity(NamedTuple):
     sensitivity: int
 
 
-class Sensitivity(_Sensitivity):
+class Sensitivity(_Trusted, _Sensitivity):
+    __slots__ = ()
+
     def __new__(cls, sensitivity: int):
         if sensitivity < 0 or sensitivity > 1000:
             raise ValueError('sensitivity must be in [0, 1000]')
         return super().__new__(cls, sensitivity)
+
+
+class PanelSettings(NamedTuple):
+    sensitivity: Sensitivity
+    ranges: tuple[SensorRange, SensorRange]
+    curve: Curve
+
+
+class PadSnapshot(NamedTuple):
+    """What a pad shows when it connects, with the panels of the active profile."""
+
+    serial: int
+    alias: str
+    hidmode: HidMode
+    changes: Changes
+    profile: ProfileId
+    panels: tuple[PanelSettings, ...]
+
+
+class PadSettings(NamedTuple):
+    """Settings of a whole pad. None and missing entries are left as they are."""
+
+    alias: str | None
+    hidmode: HidMode | None
+    profile: ProfileId | None
+    profiles: dict[ProfileId, dict[PanelId, PanelSettings]]
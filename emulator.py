@@ -0,0 +1,318 @@
+"""Pad emulator that speaks the USB protocol.
+
+Unlike FakePad, which replaces Pad, Emulator replaces the USB device, so
+Pad, the transport framing, the checksum and the protocol codecs all run
+as they do with a real pad. Transfers can be slowed down and made to fail
+for benchmarks and load tests.
+"""
+
+import copy
+import itertools
+import math
+import random
+import struct
+import time
+from collections import deque
+from datetime import timedelta
+
+import crc
+import protocol
+import usb
+from datatypes import Changes, Curve, CurveBand, CurvePoint, HidMode, Sensitivity, SensorRange
+
+
+class _Panel:
+    def __init__(self):
+        self.sensitivity = Sensitivity(500)
+        self.curve = Curve.default()
+        self.ranges = (SensorRange(100, 3000), SensorRange(100, 3000))
+
+
+class _State:
+    def __init__(self):
+        self.alias = b'Emulated'
+        self.hidmode = HidMode.Joystick
+        self.profiles = [[_Panel() for _ in range(4)] for _ in range(4)]
+
+
+class _Rejected(Exception):
+    pass
+
+
+class Emulator(usb.Transport):
+    """Answers requests like a pad with firmware 0.0.4.
+
+    Every bulk transfer waits `latency`. With `error_rate`, that share of
+    requests fails at random: the response is dropped, corrupted or an
+    error response. `seed` makes the failures and readings repeatable.
+    """
+
+    # Points that fit in the two packets a response may span.
+    MAX_POINTS = 6
+
+    def __init__(
+        self,
+        serial: int = 123456,
+        latency: timedelta = timedelta(0),
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        super().__init__()
+        self.serial = serial
+        self.latency = latency.total_seconds()
+        self.error_rate = error_rate
+        # Number of requests answered, for tests and benchmarks.
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._connected = False
+        self._responses = deque[bytes]()
+        self._state = _State()
+        self._saved = copy.deepcopy(self._state)
+        self._profile = 0
+        self._changes = Changes(0)
+        self._start = time.monotonic()
+
+    def connect(self):
+        with self.lock:
+            self._connected = True
+            self._responses.clear()
+
+    def disconnect(self):
+        with self.lock:
+            self._connected = False
+            self._responses.clear()
+
+    def bulk_write(self, data: bytes, timeout: timedelta | None = None) -> None:
+        if len(data) > 31:
+            raise usb.InvalidParamError('Request too long.')
+        if not self._connected:
+            raise usb.NoDeviceError('No pad connected.')
+        self._wait()
+        request = _packet(data)
+        if self.recorder is not None:
+            self.recorder.record_out(request)
+        self.requests += 1
+
+        try:
+            responses = self._handle(request)
+        except (_Rejected, KeyError, ValueError, IndexError):
+            responses = [_packet(b'\x4e')]
+        if self.error_rate and self._random.random() < self.error_rate:
+            match self._random.randrange(3):
+                case 0:
+                    responses = []
+                case 1:
+                    corrupted = bytearray(responses[-1])
+                    corrupted[-1] ^= 0xFF
+                    responses[-1] = bytes(corrupted)
+                case 2:
+                    responses = [_packet(b'\x4e')]
+        self._responses.extend(responses)
+
+    def bulk_read(self, timeout: timedelta | None = None) -> bytes:
+        if not self._connected:
+            raise usb.NoDeviceError('No pad connected.')
+        self._wait()
+        if not self._responses:
+            raise usb.TimeoutError('Transfer timed out.')
+        packet = self._responses.popleft()
+        if self.recorder is not None:
+            self.recorder.record_in(packet)
+        if packet[-1] != crc.checksum(packet[:-1]):
+            raise usb.ChecksumError('Checksum failure.')
+        return packet
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _handle(self, request: bytes) -> list[bytes]:
+        command = protocol.COMMANDS[request[0]]
+        args = command.request.unpack_from(request)[1:]
+        state = self._state
+        panels = state.profiles[self._profile]
+        match command:
+            case protocol.INFO:
+                return [_response(command, self.serial)]
+            case protocol.ALIAS:
+                return [_response(command, state.alias)]
+            case protocol.SET_ALIAS:
+                state.alias = args[0].rstrip(b'\x00')
+                self._changes |= Changes.Alias
+            case protocol.CHANGES:
+                return [_response(command, self._changes.value)]
+            case protocol.SAVE_CHANGES:
+                self._save(Changes(args[0]))
+            case protocol.REVERT_CHANGES:
+                self._revert(Changes(args[0]))
+            case protocol.HIDMODE:
+                return [_response(command, state.hidmode.value)]
+            case protocol.SET_HIDMODE:
+                state.hidmode = HidMode(args[0])
+                self._changes |= Changes.HidMode
+            case protocol.PROFILE:
+                return [_response(command, self._profile)]
+            case protocol.SET_PROFILE:
+                if args[0] >= len(state.profiles):
+                    raise _Rejected
+                self._profile = args[0]
+            case protocol.CURVE:
+                return _curve_response(panels[args[0]].curve)
+            case protocol.READINGS:
+                return [_response(command, *self._readings(args[0], panels[args[0]]))]
+            case protocol.ADD_CURVE_POINT:
+                panel, index, x, y = args
+                points = list(panels[panel].curve.points)
+                if index > len(points):
+                    raise _Rejected
+                points.insert(index, _point(x, y))
+                self._set_points(panels[panel], points)
+            case protocol.DELETE_CURVE_POINT:
+                panel, index = args
+                points = list(panels[panel].curve.points)
+                del points[index]
+                self._set_points(panels[panel], points)
+            case protocol.SET_CURVE_POINT:
+                panel, index, x, y = args
+                points = list(panels[panel].curve.points)
+                points[index] = _point(x, y)
+                self._set_points(panels[panel], points)
+            case protocol.RESET_CURVE:
+                panels[args[0]].curve = Curve.default()
+                self._changes |= Changes.Profile
+            case protocol.SENSITIVITY:
+                return [_response(command, panels[args[0]].sensitivity.sensitivity)]
+            case protocol.SET_SENSITIVITY:
+                panel, sensitivity = args
+                panels[panel].sensitivity = Sensitivity(sensitivity)
+                self._changes |= Changes.Profile
+            case protocol.BAND:
+                return [_response(command, *panels[args[0]].curve.band)]
+            case protocol.SET_BAND:
+                panel, below, above = args
+                panels[panel].curve = Curve(_band(below, above), panels[panel].curve.points)
+                self._changes |= Changes.Profile
+            case protocol.RANGES:
+                left, right = panels[args[0]].ranges
+                return [_response(command, *left, *right)]
+            case protocol.SET_RANGES:
+                panel, lmin, lmax, rmin, rmax = args
+                panels[panel].ranges = (SensorRange(lmin, lmax), SensorRange(rmin, rmax))
+                self._changes |= Changes.Profile
+        return [_packet(b'\x41')]
+
+    def _set_points(self, panel: _Panel, points: list[CurvePoint]):
+        if len(points) > self.MAX_POINTS or any(a.x > b.x for a, b in itertools.pairwise(points)):
+            raise _Rejected
+        panel.curve = Curve(panel.curve.band, points)
+        self._changes |= Changes.Profile
+
+    def _save(self, changes: Changes):
+        if Changes.Alias in changes:
+            self._saved.alias = self._state.alias
+        if Changes.HidMode in changes:
+            self._saved.hidmode = self._state.hidmode
+        if Changes.Profile in changes:
+            self._saved.profiles = copy.deepcopy(self._state.profiles)
+        self._changes &= ~changes
+
+    def _revert(self, changes: Changes):
+        if Changes.Alias in changes:
+            self._state.alias = self._saved.alias
+        if Changes.HidMode in changes:
+            self._state.hidmode = self._saved.hidmode
+        if Changes.Profile in changes:
+            self._state.profiles = copy.deepcopy(self._saved.profiles)
+        self._changes &= ~changes
+
+    def _readings(self, index: int, panel: _Panel) -> tuple:
+        # Each panel is stepped on for a second every four seconds, the
+        # left sensor of the pair a little harder than the right one.
+        phase = (time.monotonic() - self._start + index) % 4.0
+        force = max(0.0, math.sin(math.pi * phase)) if phase < 1.0 else 0.0
+        sensors = []
+        for sensor_range, weight in zip(panel.ranges, (1.0, 0.8)):
+            noise = self._random.uniform(-0.01, 0.01)
+            value = sensor_range.min + (force * weight + noise) * (
+                sensor_range.max - sensor_range.min
+            )
+            sensors.append(min(4095, max(0, round(value))))
+        left, right = sensors
+        x = (right - left) / max(1, left + right)
+        y = force
+        band = panel.curve.band
+        threshold = _threshold(panel.curve.points, x)
+        pressed = y > threshold + band.above
+        return (pressed, x, y, left, right)
+
+
+# Requests carry float32, so the limits are checked at that precision.
+# 0.15 as a float32 is a little more than 0.15 and must still be accepted.
+_FLOAT32 = struct.Struct('<f')
+
+
+def _float32(x: float) -> float:
+    return _FLOAT32.unpack(_FLOAT32.pack(x))[0]
+
+
+def _check(value: float, min: float, max: float):
+    if not math.isfinite(value) or value < _float32(min) or value > _float32(max):
+        raise _Rejected
+
+
+def _band(below: float, above: float) -> CurveBand:
+    _check(below, 0.0, 0.15)
+    _check(above, 0.0, 0.15)
+    return CurveBand.trusted((below, above))
+
+
+def _point(x: float, y: float) -> CurvePoint:
+    _check(x, -1.0, 1.0)
+    _check(y, 0.0, 1.0)
+    return CurvePoint.trusted((x, y))
+
+
+def _threshold(points, x: float) -> float:
+    for a, b in itertools.pairwise(points):
+        if x <= b.x:
+            if b.x == a.x:
+                return a.y
+            return a.y + (b.y - a.y) * (x - a.x) / (b.x - a.x)
+    return points[-1].y
+
+
+def _response(command: protocol.Command, *values) -> bytes:
+    assert command.response is not None
+    packet = bytearray(32)
+    command.response.pack_into(packet, 0, *values)
+    packet[0] = 0x41
+    return _checksummed(packet)
+
+
+def _curve_response(curve: Curve) -> list[bytes]:
+    header = protocol.CURVE.response
+    assert header is not None
+    points = protocol.curve_points(len(curve.points))
+    data = bytearray(max(31, header.size + points.size))
+    header.pack_into(data, 0, *curve.band, len(curve.points))
+    points.pack_into(data, header.size, *(v for point in curve.points for v in point))
+    if len(data) == 31:
+        data[0] = 0x41
+        return [_packet(data)]
+    # The first packet carries the packet count, the others their number.
+    rest = data[31:]
+    chunks = [rest[i : i + 30] for i in range(0, len(rest), 30)]
+    data[0] = 0x45
+    data[1] = 1 + len(chunks)
+    return [_packet(data[:31])] + [_packet(bytes([i]) + c) for i, c in enumerate(chunks, 1)]
+
+
+def _packet(data: bytes | bytearray) -> bytes:
+    packet = bytearray(32)
+    packet[: len(data)] = data
+    return _checksummed(packet)
+
+
+def _checksummed(packet: bytearray) -> bytes:
+    packet[-1] = crc.checksum(packet[:-1])
+    return bytes(packet)
@@ -1,4 +1,5 @@
 import random
+import time
 
 from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
 
@@ -9,13 +10,17 @@ from datatypes import (
     CurveBand,
     CurvePoint,
     HidMode,
+    PadSnapshot,
     PanelId,
+    PanelSettings,
     ProfileId,
     Readings,
+    ReadingsBatch,
     Sensitivity,
     SensorRange,
 )
-from util import throttle_key
+from history import ReadingsHistory
+from util import SampleClock, throttle_key
 
 
 class FakePanel:
@@ -71,18 +76,26 @@ class FakeProfile:
 
 class _FakePad(QObject):
     alias = Signal(str)
+    all_readings = Signal(ReadingsBatch)
     band = Signal(PanelId, CurveBand)
     changes = Signal(Changes)
+    connect_stats = Signal(float, float, float)
     connected = Signal()
     curve = Signal(PanelId, Curve)
+    device_moved = Signal(str, str)
     disconnected = Signal()
     error = Signal(str)
     hidmode = Signal(HidMode)
+    metrics = Signal(dict)
+    identity = Signal(str, int)
+    panel_settings = Signal(tuple)
     profile = Signal(ProfileId)
     ranges = Signal(PanelId, tuple)
     readings = Signal(Readings)
     sensitivity = Signal(PanelId, Sensitivity)
     serial = Signal(int)
+    snapshot = Signal(PadSnapshot)
+    stream_stats = Signal(float, int)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -91,6 +104,10 @@ class _FakePad(QObject):
         self._hidmode = HidMode.Joystick
         self._profile = ProfileId.Profile1
         self._profiles = [FakeProfile() for _ in range(4)]
+        self._poll_rate = 0.0
+        self._streaming = False
+        self._clock = SampleClock()
+        self.history = tuple(ReadingsHistory(pad.Pad.HISTORY_LENGTH) for _ in PanelId)
 
         self.poll_timer = QTimer(self)
         self.poll_timer.setInterval(100)
@@ -107,6 +124,7 @@ class _FakePad(QObject):
         self.connected.emit()
         self._refresh()
         self.start_polling()
+        self.connect_stats.emit(0.0, 0.0, 0.0)
 
     @Slot()
     def disconnect(self):
@@ -116,6 +134,7 @@ class _FakePad(QObject):
     @Slot()
     def get_info(self):
         self.serial.emit(123456)
+        self.identity.emit('', 123456)
 
     @Slot()
     def get_alias(self):
@@ -131,13 +150,11 @@ class _FakePad(QObject):
         self.changes.emit(self._changes)
 
     @Slot()
-    @throttle_key(lambda changes: changes)
     def save_changes(self, changes: Changes):
         self._changes = Changes(0)
         self.changes.emit(self._changes)
 
     @Slot()
-    @throttle_key(lambda changes: changes)
     def revert_changes(self, changes: Changes):
         self._changes = Changes(0)
         self.changes.emit(self._changes)
@@ -168,14 +185,20 @@ class _FakePad(QObject):
         self.profile.emit(self._profile)
 
     @Slot(ProfileId)
-    @throttle_key(lambda profile: profile)
     def set_profile(self, profile: ProfileId):
         self._profile = profile
         self.profile.emit(self._profile)
-        for panel in PanelId:
-            self.get_sensitivity(panel)
-            self.get_ranges(panel)
-            self.get_curve(panel)
+        self.panel_settings.emit(self._panel_settings())
+
+    def _panel_settings(self) -> tuple[PanelSettings, ...]:
+        return tuple(
+            PanelSettings(
+                fake_panel.sensitivity,
+                (fake_panel.sensors[0], fake_panel.sensors[1]),
+                Curve(fake_panel.band, fake_panel.points),
+            )
+            for fake_panel in self._profiles[self._profile.value].panels
+        )
 
     @Slot()
     @throttle_key(lambda panel: panel)
@@ -186,6 +209,20 @@ class _FakePad(QObject):
     @Slot(PanelId)
     @throttle_key(lambda panel: panel)
     def get_readings(self, panel: PanelId):
+        self.readings.emit(self._next_readings(panel))
+
+    @Slot()
+    def get_all_readings(self):
+        self.all_readings.emit(self._read_all())
+
+    def _read_all(self) -> ReadingsBatch:
+        now = time.monotonic()
+        readings = tuple(self._next_readings(panel) for panel in PanelId)
+        for history, r in zip(self.history, readings):
+            history.append(now, r.pressed, r.x, r.y, r.sensors[0], r.sensors[1])
+        return ReadingsBatch.from_readings(readings)
+
+    def _next_readings(self, panel: PanelId) -> Readings:
         fake_panel = self._profiles[self._profile.value].panels[panel.value]
         current = fake_panel.readings
         fake_panel.readings = Readings(
@@ -198,16 +235,14 @@ class _FakePad(QObject):
                 max(0, min(4095, current.sensors[1] + random.randint(-10, 10))),
             ),
         )
-        self.readings.emit(fake_panel.readings)
+        return fake_panel.readings
 
     @Slot(PanelId, int, CurvePoint)
-    @throttle_key(lambda panel, index, p: (panel, index, p))
     def add_curve_point(self, panel: PanelId, index: int, p: CurvePoint):
         fake_panel = self._profiles[self._profile.value].panels[panel.value]
         fake_panel.points.insert(index, p)
 
     @Slot(PanelId, int)
-    @throttle_key(lambda panel, index: (panel, index))
     def delete_curve_point(self, panel: PanelId, index: int):
         fake_panel = self._profiles[self._profile.value].panels[panel.value]
         fake_panel.points.pop(index)
@@ -219,7 +254,6 @@ class _FakePad(QObject):
         fake_panel.points[index] = p
 
     @Slot(PanelId)
-    @throttle_key(lambda panel: panel)
     def reset_curve(self, panel: PanelId):
         fake_panel = self._profiles[self._profile.value].panels[panel.value]
         default = Curve.default()
@@ -228,7 +262,6 @@ class _FakePad(QObject):
         self.get_curve(panel)
 
     @Slot(PanelId, Curve)
-    @throttle_key(lambda panel, _: panel)
     def set_curve(self, panel: PanelId, curve: Curve):
         fake_panel = self._profiles[self._profile.value].panels[panel.value]
         fake_panel.band = curve.band
@@ -272,6 +305,32 @@ class _FakePad(QObject):
         fake_panel.sensors[0] = ranges[0]
         fake_panel.sensors[1] = ranges[1]
 
+    @Slot(float)
+    def set_poll_rate(self, rate: float):
+        self._poll_rate = rate
+        self._update_poll_interval()
+
+    @Slot(bool)
+    def set_streaming(self, streaming: bool):
+        self._streaming = streaming
+        self._clock = SampleClock()
+        self._update_poll_interval()
+
+    def _update_poll_interval(self):
+        if self._poll_rate:
+            self.poll_timer.setInterval(max(1, round(1000 / self._poll_rate)))
+        elif self._streaming:
+            self.poll_timer.setInterval(1)
+        else:
+            self.poll_timer.setInterval(100)
+
+    @Slot(bool)
+    def set_polled(self, polled: bool):
+        if polled:
+            self.poll_timer.start()
+        else:
+            self.poll_timer.stop()
+
     @Slot()
     def start_polling(self):
         self.poll_timer.start()
@@ -282,19 +341,36 @@ class _FakePad(QObject):
 
     @Slot()
     def _poll(self):
-        for panel in PanelId:
-            self.get_readings(panel)
+        if not self._streaming:
+            self.get_all_readings()
+            return
+        readings = self._read_all()
+        now = time.monotonic()
+        if self._clock.sample(now, len(readings)):
+            self.all_readings.emit(readings)
+        if (report := self._clock.report(now)) is not None:
+            self.stream_stats.emit(*report)
+
+    @Slot()
+    def get_metrics(self):
+        self.metrics.emit({'seconds': 0.0, 'requests': {}, 'errors': {}})
+
+    @Slot()
+    def reset_metrics(self):
+        pass
 
     def _refresh(self):
-        self.get_info()
-        self.get_alias()
-        self.get_profile()
-        self.get_hidmode()
-        for panel in PanelId:
-            self.get_sensitivity(panel)
-            self.get_ranges(panel)
-            self.get_curve(panel)
-        self.get_changes()
+        self.identity.emit('', 123456)
+        self.snapshot.emit(
+            PadSnapshot(
+                123456,
+                self._alias,
+                self._hidmode,
+                self._changes,
+                self._profile,
+                self._panel_settings(),
+            )
+        )
 
     @Slot()
     def quit(self):
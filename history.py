@@ -0,0 +1,71 @@
+from array import array
+from typing import NamedTuple
+
+
+class Samples(NamedTuple):
+    time: array
+    pressed: array
+    x: array
+    y: array
+    left: array
+    right: array
+
+
+class ReadingsHistory:
+    """Ring buffer of one panel's readings, stored column by column.
+
+    One thread appends while other threads read, without locks. Appending
+    stores plain numbers in preallocated arrays and publishes the sample by
+    incrementing `total`. Readers copy whole columns and discard any samples
+    that were overwritten, or were being overwritten, while copying.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = 0
+        self._columns = Samples(
+            array('d', bytes(8 * capacity)),
+            array('B', bytes(capacity)),
+            array('f', bytes(4 * capacity)),
+            array('f', bytes(4 * capacity)),
+            array('H', bytes(2 * capacity)),
+            array('H', bytes(2 * capacity)),
+        )
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, time: float, pressed: int, x: float, y: float, left: int, right: int):
+        i = self.total % self.capacity
+        columns = self._columns
+        columns.time[i] = time
+        columns.pressed[i] = pressed
+        columns.x[i] = x
+        columns.y[i] = y
+        columns.left[i] = left
+        columns.right[i] = right
+        self.total += 1
+
+    def clear(self):
+        self.total = 0
+
+    def read(self, count: int | None = None) -> Samples:
+        """Returns copies of the last `count` samples, oldest first."""
+        end = self.total
+        start = max(0, end - self.capacity if count is None else end - min(count, self.capacity))
+        samples = Samples(*(self._slice(column, start, end) for column in self._columns))
+
+        # The writer may have wrapped around into the copied range meanwhile,
+        # and may be part-way through the sample after the last it published,
+        # which overwrites the oldest one.
+        overwritten = self.total - self.capacity + 1 - start
+        if overwritten > 0:
+            samples = Samples(*(column[overwritten:] for column in samples))
+        return samples
+
+    def _slice(self, column: array, start: int, end: int) -> array:
+        first = start % self.capacity
+        last = first + (end - start)
+        if last <= self.capacity:
+            return column[first:last]
+        return column[first:] + column[: last - self.capacity]
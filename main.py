@@ -1,16 +1,110 @@
+import argparse
 import sys
+from typing import TYPE_CHECKING
 
-from PySide6.QtCore import QMetaObject, Qt
-from PySide6.QtGui import QGuiApplication, QIcon
-from PySide6.QtQml import QQmlApplicationEngine
+# The GUI modules are imported in main() so that --cli starts without them.
+if TYPE_CHECKING:
+    from model import Model
+    from pad import Pad
 
-import rc_resources  # noqa: F401
-from model import Model
-from pad import Pad
-from util import Throttle
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Configuration app for the BlueCombo Halfpad.')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--fake-pad', action='store_true', help='use a simulated pad')
+    source.add_argument(
+        '--emulate', action='store_true', help='use an emulated pad behind the real USB code'
+    )
+    source.add_argument('--replay', metavar='FILE', help='replay a capture made with --record')
+    parser.add_argument(
+        '--cli',
+        action='store_true',
+        help='run a command without the GUI, must be the first argument (see --cli -h)',
+    )
+    parser.add_argument('--record', metavar='FILE', help='record all packets to a capture file')
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='read sensors continuously as fast as the pad allows',
+    )
+    parser.add_argument(
+        '--poll-rate',
+        type=float,
+        default=0.0,
+        metavar='HZ',
+        help='sensor polling rate (default: 10 Hz, unlimited with --stream)',
+    )
+    # Leave the rest for Qt.
+    args, _ = parser.parse_known_args(argv[1:])
+    return args
+
+
+def wire(model: 'Model', pad: 'Pad', throttle: 'Pad', connect: bool = True):
+    """Connects or disconnects a pad and the model."""
+    for signal, slot in [
+        (pad.alias, model.pad_alias),
+        (pad.all_readings, model.pad_all_readings),
+        (pad.band, model.pad_band),
+        (pad.changes, model.pad_changes),
+        (pad.connected, model.pad_connected),
+        (pad.curve, model.pad_curve),
+        (pad.disconnected, model.pad_disconnected),
+        (pad.error, model.pad_error),
+        (pad.hidmode, model.pad_hidmode),
+        (pad.metrics, model.pad_metrics),
+        (pad.panel_settings, model.pad_panel_settings),
+        (pad.profile, model.pad_profile),
+        (pad.ranges, model.pad_ranges),
+        (pad.readings, model.pad_readings),
+        (pad.sensitivity, model.pad_sensitivity),
+        (pad.serial, model.pad_serial),
+        (pad.snapshot, model.pad_snapshot),
+        (pad.stream_stats, model.pad_stream_stats),
+        (pad.connect_stats, model.pad_connect_stats),
+        (model.alias_set, throttle.set_alias),
+        (model.changes_reverted, throttle.revert_changes),
+        (model.changes_saved, throttle.save_changes),
+        (model.curve_band_set, throttle.set_band),
+        (model.curve_point_added, throttle.add_curve_point),
+        (model.curve_point_deleted, throttle.delete_curve_point),
+        (model.curve_point_moved, throttle.set_curve_point),
+        (model.curve_reset, throttle.reset_curve),
+        (model.curve_set, throttle.set_curve),
+        (model.do_connect, throttle.connect),
+        (model.do_disconnect, throttle.disconnect),
+        (model.hidmode_set, throttle.set_hidmode),
+        (model.profile_set, throttle.set_profile),
+        (model.range_set, throttle.set_ranges),
+        (model.sensitivity_set, throttle.set_sensitivity),
+        # Not pad writes, so not throttled.
+        (model.poll_rate_set, pad.set_poll_rate),
+        (model.streaming_set, pad.set_streaming),
+        (model.do_get_metrics, pad.get_metrics),
+        (model.do_reset_metrics, pad.reset_metrics),
+    ]:
+        if connect:
+            signal.connect(slot)
+        else:
+            signal.disconnect(slot)
 
 
 def main():
+    if sys.argv[1:2] == ['--cli']:
+        import cli
+
+        return cli.main(sys.argv[2:])
+
+    from PySide6.QtCore import Q_ARG, QMetaObject, Qt
+    from PySide6.QtGui import QGuiApplication, QIcon
+    from PySide6.QtQml import QQmlApplicationEngine
+
+    import rc_resources  # noqa: F401
+    import usb
+    from model import Model
+    from pad import Pad
+    from util import Throttle
+
+    args = parse_args(sys.argv)
     model = Model()
 
     app = QGuiApplication(sys.argv)
@@ -19,43 +113,73 @@ def main():
     app.setApplicationDisplayName(model.app.title)
     app.setWindowIcon(QIcon(':/decent.svg'))
 
-    if '--fake-pad' in sys.argv[1:]:
+    hotplug: usb.Hotplug | None = None
+    if args.fake_pad:
         from fakepad import FakePad
 
-        pad = FakePad()
+        pads = [FakePad()]
+    elif args.emulate:
+        from emulator import Emulator
+
+        pads = [Pad(transport=Emulator())]
+    elif args.replay:
+        from capture import Replay
+
+        pads = [Pad(transport=Replay(args.replay))]
     else:
-        pad = Pad()
-
-    pad.alias.connect(model.pad_alias)
-    pad.band.connect(model.pad_band)
-    pad.changes.connect(model.pad_changes)
-    pad.connected.connect(model.pad_connected)
-    pad.curve.connect(model.pad_curve)
-    pad.disconnected.connect(model.pad_disconnected)
-    pad.error.connect(model.pad_error)
-    pad.hidmode.connect(model.pad_hidmode)
-    pad.profile.connect(model.pad_profile)
-    pad.ranges.connect(model.pad_ranges)
-    pad.readings.connect(model.pad_readings)
-    pad.sensitivity.connect(model.pad_sensitivity)
-    pad.serial.connect(model.pad_serial)
-
-    throttle = Throttle(pad)
-    model.alias_set.connect(throttle.set_alias)
-    model.changes_reverted.connect(throttle.revert_changes)
-    model.changes_saved.connect(throttle.save_changes)
-    model.curve_band_set.connect(throttle.set_band)
-    model.curve_point_added.connect(throttle.add_curve_point)
-    model.curve_point_deleted.connect(throttle.delete_curve_point)
-    model.curve_point_moved.connect(throttle.set_curve_point)
-    model.curve_reset.connect(throttle.reset_curve)
-    model.curve_set.connect(throttle.set_curve)
-    model.do_connect.connect(throttle.connect)
-    model.do_disconnect.connect(throttle.disconnect)
-    model.hidmode_set.connect(throttle.set_hidmode)
-    model.profile_set.connect(throttle.set_profile)
-    model.range_set.connect(throttle.set_ranges)
-    model.sensitivity_set.connect(throttle.set_sensitivity)
+        # One pad and thread per device. Without devices, Connect looks for any.
+        device_ids = usb.enumerate_pads()
+        pads = [Pad(transport=usb.Usb(device_id)) for device_id in device_ids] or [Pad()]
+        model.set_devices([str(device_id) for device_id in device_ids])
+
+        # One watcher for all of them, each pad checks whether it is its device.
+        def arrived(device_id: usb.DeviceId, port: tuple[int, ...]):
+            for pad in pads:
+                pad.device_arrived(device_id, port)
+
+        def left(device_id: usb.DeviceId):
+            for pad in pads:
+                pad.device_left(device_id)
+
+        hotplug = usb.Hotplug(arrived, left)
+
+    if args.record and not args.fake_pad:
+        from capture import Recorder
+
+        # Only the first pad is recorded.
+        pads[0].usb.recorder = Recorder(args.record)
+
+    # The throttles size their window from the round trips of the pad.
+    throttles = [Throttle(pad, None if args.fake_pad else pad.usb.metrics) for pad in pads]
+    for pad in pads:
+        pad.identity.connect(model.pad_identity)
+        pad.device_moved.connect(model.pad_device_moved)
+
+    # Only the selected pad is wired to the model and polled, also when the
+    # others reconnect after being plugged in again.
+    current = 0
+    wire(model, pads[current], throttles[current])
+    model.set_history(pads[current].history)
+
+    def set_polled(pad: 'Pad', polled: bool):
+        queued = Qt.ConnectionType.QueuedConnection
+        QMetaObject.invokeMethod(pad, 'set_polled', queued, Q_ARG(bool, polled))  # pyright: ignore[reportCallIssue, reportArgumentType]
+
+    def select_device(index: int):
+        nonlocal current
+        wire(model, pads[current], throttles[current], connect=False)
+        set_polled(pads[current], False)
+        current = index
+        wire(model, pads[current], throttles[current])
+        model.set_history(pads[current].history)
+        model.poll_rate_set.emit(model.poll_rate)
+        model.streaming_set.emit(model.streaming)
+        set_polled(pads[current], True)
+        QMetaObject.invokeMethod(pads[current], 'connect', Qt.ConnectionType.QueuedConnection)  # pyright: ignore[reportCallIssue, reportArgumentType]
+
+    model.device_set.connect(select_device)
+    model.poll_rate = args.poll_rate
+    model.streaming = args.stream
 
     engine = QQmlApplicationEngine()
     engine.setInitialProperties({'model': model})
@@ -63,12 +187,21 @@ def main():
     if not engine.rootObjects():
         return -1
 
-    QMetaObject.invokeMethod(pad, 'connect', Qt.ConnectionType.QueuedConnection)  # pyright: ignore[reportCallIssue, reportArgumentType]
+    # Connecting every pad reads their serial numbers for the device list.
+    for pad in pads[1:]:
+        set_polled(pad, False)
+    for pad in pads:
+        QMetaObject.invokeMethod(pad, 'connect', Qt.ConnectionType.QueuedConnection)  # pyright: ignore[reportCallIssue, reportArgumentType]
 
+    if hotplug is not None:
+        hotplug.start()
     try:
         return app.exec()
     finally:
-        QMetaObject.invokeMethod(pad, 'quit', Qt.ConnectionType.QueuedConnection)  # pyright: ignore[reportCallIssue, reportArgumentType]
+        if hotplug is not None:
+            hotplug.stop()
+        for pad in pads:
+            QMetaObject.invokeMethod(pad, 'quit', Qt.ConnectionType.QueuedConnection)  # pyright: ignore[reportCallIssue, reportArgumentType]
         del engine
 
 
@@ -0,0 +1,111 @@
+"""Request counts, round-trip times and errors of a transport.
+
+Everything is counted in preallocated per-opcode tables with fixed
+histogram buckets, so recording a request only increments integers and
+can stay on permanently. The throttle that schedules the requests adds
+its window and counters.
+"""
+
+import bisect
+import threading
+import time
+
+import protocol
+
+# Upper bounds of the round-trip time buckets in milliseconds. The last
+# bucket has no upper bound.
+BUCKETS_MS = (0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0)
+_BUCKETS_NS = tuple(int(1e6 * bound) for bound in BUCKETS_MS)
+
+
+class Metrics:
+    """Recorded from the pad thread and the streaming thread, read from either."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Moving average of the recent round trips, 0 before the first.
+        self.recent_ns = 0
+        # Set by the throttle: its coalescing window and calls per flush,
+        # 0 for no limit.
+        self.window_ms = 0
+        self.batch = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.start = time.monotonic()
+            self.count = [0] * 256
+            self.failed = [0] * 256
+            self.total_ns = [0] * 256
+            self.histogram = [[0] * (len(_BUCKETS_NS) + 1) for _ in range(256)]
+            # Error class name -> count.
+            self.errors = dict[str, int]()
+            # Throttled calls replaced by a later call and calls made.
+            self.coalesced = 0
+            self.dispatched = 0
+
+    def record(self, opcode: int, round_trip_ns: int):
+        with self._lock:
+            if self.recent_ns:
+                self.recent_ns += (round_trip_ns - self.recent_ns) // 8
+            else:
+                self.recent_ns = round_trip_ns
+            self.count[opcode] += 1
+            self.total_ns[opcode] += round_trip_ns
+            self.histogram[opcode][bisect.bisect_left(_BUCKETS_NS, round_trip_ns)] += 1
+
+    def record_error(self, opcode: int, error: Exception):
+        with self._lock:
+            self.failed[opcode] += 1
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def snapshot(self) -> dict:
+        """Returns the metrics of the requests seen so far, ready for JSON."""
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> dict:
+        seconds = time.monotonic() - self.start
+        requests = dict[str, dict]()
+        for opcode in range(256):
+            count, failed = self.count[opcode], self.failed[opcode]
+            if not count and not failed:
+                continue
+            command = protocol.COMMANDS.get(opcode)
+            histogram = self.histogram[opcode]
+            requests[command.name if command else f'0x{opcode:02X}'] = {
+                'opcode': opcode,
+                'count': count,
+                'failed': failed,
+                'per_second': count / seconds if seconds else 0.0,
+                'mean_ms': self.total_ns[opcode] / count / 1e6 if count else 0.0,
+                'p50_ms': _percentile(histogram, 0.5),
+                'p99_ms': _percentile(histogram, 0.99),
+                'histogram': dict(zip([*map(str, BUCKETS_MS), 'inf'], histogram)),
+            }
+        return {
+            'seconds': seconds,
+            'requests': requests,
+            'errors': dict(self.errors),
+            'throttle': {
+                'round_trip_ms': self.recent_ns / 1e6,
+                'window_ms': self.window_ms,
+                'batch': self.batch,
+                'coalesced': self.coalesced,
+                'dispatched': self.dispatched,
+            },
+        }
+
+
+def _percentile(histogram: list[int], fraction: float) -> float | None:
+    # The upper bound of the bucket, None if it has no upper bound.
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    seen = 0
+    for bound, count in zip(BUCKETS_MS, histogram):
+        seen += count
+        if seen >= fraction * total:
+            return bound
+    return None
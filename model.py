@@ -1,9 +1,11 @@
+import bisect
 import math
-from typing import Callable, TypeVar
+from typing import Callable, Sequence, TypeVar
 
 import PySide6.QtCore
 import PySide6.QtQml
 from PySide6.QtCore import QObject, QPointF, QResource, Signal, Slot
+from PySide6.QtGraphs import QXYSeries
 
 from datatypes import (
     Changes,
@@ -11,12 +13,16 @@ from datatypes import (
     CurveBand,
     CurvePoint,
     HidMode,
+    PadSnapshot,
     PanelId,
+    PanelSettings,
     ProfileId,
     Readings,
+    ReadingsBatch,
     Sensitivity,
     SensorRange,
 )
+from history import ReadingsHistory
 
 QML_IMPORT_NAME = 'Model'
 QML_IMPORT_MAJOR_VERSION = 1
@@ -206,37 +212,102 @@ class Range(QObject):
 
 @QmlElement
 class Sensor(QObject):
-    level_changed = Signal()
+    # The level is Panel.levels, so that one signal notifies a whole panel.
 
     def __init__(self, parent, name: str):
         super().__init__(parent)
         self._name = name
-        self._level = 0
         self._range = Range(self)
 
     @Property(str, constant=True, final=True)
     def name(self):
         return self._name
 
-    @Property(float, notify=level_changed, final=True)
-    def level(self):
-        return self._level
-
     @Property(Range, constant=True, final=True)
     def range(self):
         return self._range
 
-    @Slot(int)
-    def pad_level(self, level: int):
-        self._level = level / 4095.0
-        self.level_changed.emit()
+
+@QmlElement
+class Trace(QObject):
+    """Recent sensor levels and pressed state of a panel, for plotting."""
+
+    def __init__(self, parent, flipped: bool, window: float = 10.0, buckets: int = 500):
+        super().__init__(parent)
+        self._flipped = flipped
+        self._history: ReadingsHistory | None = None
+        self._total = -1
+        self._window = window
+        self._buckets = buckets
+        # Reused every frame, so updating a series does not create points.
+        self._points = tuple([QPointF() for _ in range(2 * buckets)] for _ in range(3))
+
+    @Property(float, constant=True, final=True)
+    def window(self):
+        return self._window
+
+    @Slot(QXYSeries, QXYSeries, QXYSeries)
+    def update_series(self, first: QXYSeries, second: QXYSeries, pressed: QXYSeries):
+        """Replaces the points of each series with the last `window` seconds of samples.
+
+        Long histories are reduced to the minimum and maximum of each of
+        `buckets` time slices. Does nothing if there are no new samples.
+        """
+        if self._history is None or self._history.total == self._total:
+            return
+        self._total = self._history.total
+        samples = self._history.read()
+        if not samples.time:
+            for series in (first, second, pressed):
+                series.clear()
+            return
+
+        levels = (samples.right, samples.left) if self._flipped else (samples.left, samples.right)
+        end = len(samples.time)
+        start = bisect.bisect_left(samples.time, samples.time[-1] - self._window)
+        step = math.ceil((end - start) / self._buckets)
+        for series, points, column in zip((first, second), self._points, levels):
+            count = self._fill(points, samples.time, column, start, end, step, 1 / 4095, True)
+            series.replace(points[:count])
+        count = self._fill(self._points[2], samples.time, samples.pressed, start, end, step, 1)
+        pressed.replace(self._points[2][:count])
+
+    @staticmethod
+    def _fill(
+        points: list[QPointF],
+        times: Sequence[float],
+        column: Sequence[float],
+        start: int,
+        end: int,
+        step: int,
+        scale: float,
+        min_max: bool = False,
+    ) -> int:
+        now = times[-1]
+        count = 0
+        for i in range(start, end, step):
+            x = times[i] - now
+            if step == 1:
+                points[count].setX(x)
+                points[count].setY(scale * column[i])
+                count += 1
+                continue
+            bucket = column[i : i + step]
+            if min_max:
+                points[count].setX(x)
+                points[count].setY(scale * min(bucket))
+                count += 1
+            points[count].setX(x)
+            points[count].setY(scale * max(bucket))
+            count += 1
+        return count
 
 
 @QmlElement
 class Panel(QObject):
     sensitivity_changed = Signal()
-    dot_changed = Signal()
-    pressed_changed = Signal()
+    # Notifies dot, levels and pressed at once.
+    readings_changed = Signal()
 
     range_set = Signal(PanelId, tuple)
     sensitivity_set = Signal(PanelId, Sensitivity)
@@ -245,11 +316,17 @@ class Panel(QObject):
         super().__init__(parent)
         self._id = id
         self._curve = CurveModel(self, id, flipped)
+        # Updated in place, QML gets a copy.
         self._dot = QPointF(0.0, -10.0)
         self._flipped = flipped
+        # Of the first and second sensor, from 0 to 1.
+        self._levels = (0.0, 0.0)
         self._pressed = False
+        # Latest (pressed, x, y, left, right) not shown yet.
+        self._pending: tuple[bool, float, float, int, int] | None = None
         self._sensitivity = 0
         self._sensors = (Sensor(self, sensor1_name), Sensor(self, sensor2_name))
+        self._trace = Trace(self, flipped)
         for sensor in self._sensors:
             sensor._range.range_set.connect(
                 lambda: self.range_set.emit(
@@ -265,15 +342,23 @@ class Panel(QObject):
     def curve(self):
         return self._curve
 
-    @Property(QPointF, notify=dot_changed, final=True)
+    @Property(QPointF, notify=readings_changed, final=True)
     def dot(self):
         return self._dot
 
+    @Property(list, notify=readings_changed, final=True)
+    def levels(self):
+        """Sensor levels in the order of `sensors`."""
+        if self._flipped:
+            return list(reversed(self._levels))
+        else:
+            return list(self._levels)
+
     @Property(str, constant=True, final=True)
     def name(self):
         return self._id.name
 
-    @Property(bool, notify=pressed_changed, final=True)
+    @Property(bool, notify=readings_changed, final=True)
     def pressed(self):
         return self._pressed
 
@@ -288,6 +373,10 @@ class Panel(QObject):
     def sensitivity(self):
         return self._sensitivity / 1000.0
 
+    @Property(Trace, constant=True, final=True)
+    def trace(self):
+        return self._trace
+
     @sensitivity.setter
     def sensitivity(self, x):
         i = max(0, min(1000, math.ceil(x * 1000.0)))
@@ -298,12 +387,32 @@ class Panel(QObject):
 
     @Slot(Readings)
     def pad_readings(self, readings: Readings):
-        self._pressed = readings.pressed
-        self._dot = QPointF(readings.x, readings.y)
-        self.pressed_changed.emit()
-        self.dot_changed.emit()
-        for i in range(2):
-            self._sensors[i].pad_level(readings.sensors[i])
+        self.queue_readings(readings.pressed, readings.x, readings.y, *readings.sensors)
+
+    def queue_readings(self, pressed: bool, x: float, y: float, left: int, right: int):
+        """Keeps readings to show with the next update_readings."""
+        self._pending = (pressed, x, y, left, right)
+
+    def update_readings(self, epsilon: float):
+        """Shows the latest readings if pressed changed or a value moved more than `epsilon`."""
+        if self._pending is None:
+            return
+        pressed, x, y, left, right = self._pending
+        self._pending = None
+        first, second = self._levels
+        if (
+            pressed == self._pressed
+            and abs(x - self._dot.x()) <= epsilon
+            and abs(y - self._dot.y()) <= epsilon
+            and abs(left / 4095.0 - first) <= epsilon
+            and abs(right / 4095.0 - second) <= epsilon
+        ):
+            return
+        self._pressed = pressed
+        self._dot.setX(x)
+        self._dot.setY(y)
+        self._levels = (left / 4095.0, right / 4095.0)
+        self.readings_changed.emit()
 
     @Slot(Sensitivity)
     def pad_sensitivity(self, sensitivity: Sensitivity):
@@ -347,11 +456,19 @@ class AppInfo(QObject):
 class Model(QObject):
     alias_changed = Signal()
     connected_changed = Signal()
+    connect_stats_changed = Signal()
     changes_changed = Signal()
+    device_changed = Signal()
+    devices_changed = Signal()
     hidmode_changed = Signal()
     message_changed = Signal()
+    metrics_changed = Signal()
+    poll_rate_changed = Signal()
     profile_changed = Signal()
+    readings_epsilon_changed = Signal()
     serial_changed = Signal()
+    stream_stats_changed = Signal()
+    streaming_changed = Signal()
 
     alias_set = Signal(str)
     curve_band_set = Signal(PanelId, CurveBand)
@@ -362,23 +479,44 @@ class Model(QObject):
     curve_point_moved = Signal(PanelId, int, CurvePoint)
     curve_reset = Signal(PanelId)
     curve_set = Signal(PanelId, Curve)
+    device_set = Signal(int)
     do_connect = Signal()
     do_disconnect = Signal()
+    do_get_metrics = Signal()
+    do_reset_metrics = Signal()
     hidmode_set = Signal(HidMode)
+    poll_rate_set = Signal(float)
     profile_set = Signal(ProfileId)
     range_set = Signal(PanelId, tuple)
     sensitivity_set = Signal(PanelId, Sensitivity)
+    streaming_set = Signal(bool)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._alias = 'Unnamed'
         self._app = AppInfo(self)
+        self._cache_metrics = dict[str, int]()
         self._changes = Changes(0)
         self._connected = False
+        self._connect_time = 0.0
+        self._device = 0
+        self._devices = list[str]()
+        self._device_serials = dict[str, int]()
+        self._error_metrics = list[dict]()
         self._hidmode = HidMode.Hidden
         self._message = None
+        self._poll_rate = 0.0
         self._profile = -1
+        # Smallest change of a reading that is shown, in units of full scale.
+        self._readings_epsilon = 0.001
+        self._ready_time = 0.0
+        self._request_metrics = list[dict]()
+        self._throttle_metrics = dict[str, float]()
+        self._dropped_frames = 0
+        self._downtime = 0.0
+        self._sample_rate = 0.0
         self._serial = 0
+        self._streaming = False
 
         self._panels = (
             Panel(self, PanelId.Left, 'Back', 'Front', flipped=True),
@@ -430,6 +568,36 @@ class Model(QObject):
     def connected(self):
         return self._connected
 
+    @Property(float, notify=connect_stats_changed, final=True)
+    def connect_time(self):
+        return self._connect_time
+
+    @Property(float, notify=connect_stats_changed, final=True)
+    def ready_time(self):
+        return self._ready_time
+
+    @Property(float, notify=connect_stats_changed, final=True)
+    def downtime(self):
+        return self._downtime
+
+    @Property(int, notify=device_changed, final=True)
+    def device(self):
+        return self._device
+
+    @device.setter
+    def device(self, x):
+        if self._device != x and 0 <= x < len(self._devices):
+            self._device = x
+            self.device_changed.emit()
+            self.device_set.emit(x)
+
+    @Property(list, notify=devices_changed, final=True)
+    def devices(self):
+        return [
+            f'{self._device_serials[name]} ({name})' if name in self._device_serials else name
+            for name in self._devices
+        ]
+
     @Property(bool, notify=changes_changed, final=True)
     def has_changes(self):
         return bool(self._changes)
@@ -458,6 +626,33 @@ class Model(QObject):
             self._message = x
             self.message_changed.emit()
 
+    @Property(list, notify=metrics_changed, final=True)
+    def request_metrics(self):
+        return self._request_metrics
+
+    @Property(list, notify=metrics_changed, final=True)
+    def error_metrics(self):
+        return self._error_metrics
+
+    @Property(dict, notify=metrics_changed, final=True)
+    def cache_metrics(self):
+        return self._cache_metrics
+
+    @Property(dict, notify=metrics_changed, final=True)
+    def throttle_metrics(self):
+        return self._throttle_metrics
+
+    @Property(float, notify=poll_rate_changed, final=True)
+    def poll_rate(self):
+        return self._poll_rate
+
+    @poll_rate.setter
+    def poll_rate(self, x):
+        if self._poll_rate != x:
+            self._poll_rate = x
+            self.poll_rate_changed.emit()
+            self.poll_rate_set.emit(x)
+
     @Property(int, notify=profile_changed, final=True)
     def profile(self):
         return self._profile
@@ -473,10 +668,55 @@ class Model(QObject):
     def panels(self):
         return list(self._panels)
 
+    @Property(float, notify=readings_epsilon_changed, final=True)
+    def readings_epsilon(self):
+        return self._readings_epsilon
+
+    @readings_epsilon.setter
+    def readings_epsilon(self, x):
+        if self._readings_epsilon != x:
+            self._readings_epsilon = x
+            self.readings_epsilon_changed.emit()
+
     @Property(int, notify=serial_changed, final=True)
     def serial(self):
         return self._serial
 
+    @Property(bool, notify=streaming_changed, final=True)
+    def streaming(self):
+        return self._streaming
+
+    @streaming.setter
+    def streaming(self, x):
+        if self._streaming != x:
+            self._streaming = x
+            self.streaming_changed.emit()
+            self.streaming_set.emit(x)
+            self.pad_stream_stats(0.0, 0)
+
+    @Property(float, notify=stream_stats_changed, final=True)
+    def sample_rate(self):
+        return self._sample_rate
+
+    @Property(int, notify=stream_stats_changed, final=True)
+    def dropped_frames(self):
+        return self._dropped_frames
+
+    def set_devices(self, names: list[str]):
+        self._devices = names
+        self.devices_changed.emit()
+
+    def set_history(self, history: Sequence[ReadingsHistory]):
+        for panel, panel_history in zip(self._panels, history):
+            panel._trace._history = panel_history
+            panel._trace._total = -1
+
+    @Slot()
+    def update_readings(self):
+        """Shows the readings received since the last call, once per frame."""
+        for panel in self._panels:
+            panel.update_readings(self._readings_epsilon)
+
     @Slot()
     def _handle_change(self):
         self._changes |= Changes.Profile
@@ -511,6 +751,13 @@ class Model(QObject):
             self._changes = changes
             self.changes_changed.emit()
 
+    @Slot(float, float, float)
+    def pad_connect_stats(self, connect_time: float, ready_time: float, downtime: float):
+        self._connect_time = connect_time
+        self._ready_time = ready_time
+        self._downtime = downtime
+        self.connect_stats_changed.emit()
+
     @Slot()
     def pad_connected(self):
         self._connected = True
@@ -520,6 +767,14 @@ class Model(QObject):
     def pad_curve(self, panel: PanelId, curve: Curve):
         self._panels[panel.value].curve.pad_curve(curve)
 
+    @Slot(str, str)
+    def pad_device_moved(self, old: str, new: str):
+        if old in self._devices:
+            self._devices[self._devices.index(old)] = new
+            if old in self._device_serials:
+                self._device_serials[new] = self._device_serials.pop(old)
+            self.devices_changed.emit()
+
     @Slot()
     def pad_disconnected(self):
         self._connected = False
@@ -535,6 +790,19 @@ class Model(QObject):
         self._profile = profile.value
         self.profile_changed.emit()
 
+    @Slot(tuple)
+    def pad_panel_settings(self, panel_settings: tuple[PanelSettings, ...]):
+        for panel, settings in zip(PanelId, panel_settings):
+            self.pad_sensitivity(panel, settings.sensitivity)
+            self.pad_ranges(panel, settings.ranges)
+            self.pad_curve(panel, settings.curve)
+
+    @Slot(str, int)
+    def pad_identity(self, name: str, serial: int):
+        if name in self._devices:
+            self._device_serials[name] = serial
+            self.devices_changed.emit()
+
     @Slot(PanelId, tuple)
     def pad_ranges(self, panel: PanelId, ranges: tuple[SensorRange, SensorRange]):
         for i in range(2):
@@ -544,15 +812,53 @@ class Model(QObject):
     def pad_readings(self, readings: Readings):
         self._panels[readings.panel.value].pad_readings(readings)
 
+    @Slot(ReadingsBatch)
+    def pad_all_readings(self, all_readings: ReadingsBatch):
+        # Only the last readings of each panel are shown.
+        pressed, x, y = all_readings.pressed, all_readings.x, all_readings.y
+        left, right = all_readings.left, all_readings.right
+        for i in range(max(0, len(x) - len(self._panels)), len(x)):
+            self._panels[i % len(self._panels)].queue_readings(
+                pressed[i] != 0, x[i], y[i], left[i], right[i]
+            )
+
     @Slot(int)
     def pad_serial(self, serial: int):
         self._serial = serial
         self.serial_changed.emit()
 
+    @Slot(PadSnapshot)
+    def pad_snapshot(self, snapshot: PadSnapshot):
+        self.pad_serial(snapshot.serial)
+        self.pad_alias(snapshot.alias)
+        self.pad_hidmode(snapshot.hidmode)
+        self.pad_changes(snapshot.changes)
+        self.pad_profile(snapshot.profile)
+        self.pad_panel_settings(snapshot.panels)
+
+    @Slot(float, int)
+    def pad_stream_stats(self, sample_rate: float, dropped_frames: int):
+        self._sample_rate = sample_rate
+        self._dropped_frames = dropped_frames
+        self.stream_stats_changed.emit()
+
     @Slot(PanelId, Sensitivity)
     def pad_sensitivity(self, panel: PanelId, sensitivity: Sensitivity):
         self._panels[panel.value].pad_sensitivity(sensitivity)
 
+    @Slot(dict)
+    def pad_metrics(self, metrics: dict):
+        self._request_metrics = [
+            {'name': name} | {k: v for k, v in request.items() if k != 'histogram'}
+            for name, request in sorted(metrics['requests'].items(), key=lambda x: x[1]['opcode'])
+        ]
+        self._error_metrics = [
+            {'name': name, 'count': count} for name, count in sorted(metrics['errors'].items())
+        ]
+        self._throttle_metrics = metrics.get('throttle', {})
+        self._cache_metrics = metrics.get('cache', {})
+        self.metrics_changed.emit()
+
     @Slot(str)
     def pad_error(self, error: str):
         self.message = error
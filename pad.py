@@ -1,9 +1,12 @@
 import functools
 import itertools
-import struct
+import threading
+import time
+from datetime import timedelta
 
 from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
 
+import protocol
 import usb
 from datatypes import (
     Changes,
@@ -11,13 +14,36 @@ from datatypes import (
     CurveBand,
     CurvePoint,
     HidMode,
+    PadSnapshot,
     PanelId,
+    PanelSettings,
     ProfileId,
     Readings,
+    ReadingsBatch,
     Sensitivity,
     SensorRange,
 )
-from util import throttle_key
+from history import ReadingsHistory
+from padstate import PadState, with_band, with_point_added, with_point_deleted, with_point_set
+from util import SampleClock, throttle_key
+
+# Sent on every poll.
+_READINGS_REQUESTS = tuple(protocol.READINGS.pack(panel.value) for panel in PanelId)
+# The settings of every panel in the active profile, three requests per panel.
+_PANEL_REQUESTS = tuple(
+    command.pack(panel.value)
+    for panel in PanelId
+    for command in (protocol.SENSITIVITY, protocol.RANGES, protocol.CURVE)
+)
+# Everything the model shows, read in one batch on connect.
+_SNAPSHOT_REQUESTS = (
+    protocol.INFO.pack(),
+    protocol.ALIAS.pack(),
+    protocol.HIDMODE.pack(),
+    protocol.CHANGES.pack(),
+    protocol.PROFILE.pack(),
+    *_PANEL_REQUESTS,
+)
 
 
 def handle_errors(func):
@@ -38,32 +64,75 @@ def handle_errors(func):
 
 class Pad(QObject):
     alias = Signal(str)
+    all_readings = Signal(ReadingsBatch)
     band = Signal(PanelId, CurveBand)
     changes = Signal(Changes)
+    connect_stats = Signal(float, float, float)
     connected = Signal()
     curve = Signal(PanelId, Curve)
+    # Old and new name of the pad's device after it was plugged in again.
+    device_moved = Signal(str, str)
     disconnected = Signal()
     error = Signal(str)
     hidmode = Signal(HidMode)
+    metrics = Signal(dict)
+    identity = Signal(str, int)
+    panel_settings = Signal(tuple)
     profile = Signal(ProfileId)
     ranges = Signal(PanelId, tuple)
     readings = Signal(Readings)
     sensitivity = Signal(PanelId, Sensitivity)
     serial = Signal(int)
+    snapshot = Signal(PadSnapshot)
+    stream_stats = Signal(float, int)
+
+    _stream_lost = Signal()
+    _device_arrived = Signal(object, object)
+    _device_left = Signal(object)
+
+    HISTORY_LENGTH = 16384
+    POLL_INTERVAL_MS = 100
+    # Pause before reading each profile that is not cached yet.
+    PREFETCH_DELAY_MS = 50
+    STREAM_TIMEOUT = timedelta(milliseconds=100)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, transport: usb.Transport | None = None, threaded: bool = True):
         super().__init__(parent)
-        self.usb = usb.Usb()
+        self.usb = transport if transport is not None else usb.Usb()
 
         self.poll_timer = QTimer(self)
-        self.poll_timer.setInterval(100)
+        self.poll_timer.setInterval(self.POLL_INTERVAL_MS)
         self.poll_timer.timeout.connect(self._poll)
 
-        self._thread = QThread()
-        self._thread.setObjectName('Pad thread')
-        self._thread.finished.connect(self.deleteLater)
-        self.moveToThread(self._thread)
-        self._thread.start()
+        # Every polled sample, timestamped with time.monotonic(), one per panel.
+        self.history = tuple(ReadingsHistory(self.HISTORY_LENGTH) for _ in PanelId)
+        self._poll_rate = 0.0
+        self._polled = True
+        self._streaming = False
+        self._streamer: threading.Thread | None = None
+        self._stop_streamer = threading.Event()
+        self._stream_lost.connect(self.disconnect)
+        # Panel settings already read or written, so they need not be read.
+        self.state = PadState()
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.timeout.connect(self._prefetch)
+        # When the open pad was lost, for measuring how long it was gone.
+        self._open = False
+        self._lost_at: float | None = None
+
+        self._device_arrived.connect(self._on_device_arrived)
+        self._device_left.connect(self._on_device_left)
+
+        # Without a thread the read_* and write_* methods are called directly,
+        # as the command line interface does.
+        self._thread: QThread | None = None
+        if threaded:
+            self._thread = QThread()
+            self._thread.setObjectName('Pad thread')
+            self._thread.finished.connect(self.deleteLater)
+            self.moveToThread(self._thread)
+            self._thread.start()
 
     def __del__(self):
         del self.usb
@@ -73,10 +142,18 @@ class Pad(QObject):
     def connect(self):
         try:
             self.stop_polling()
+            start = time.perf_counter()
             self.usb.connect()
+            end = time.perf_counter()
+            self._open = True
+            downtime = 0.0 if self._lost_at is None else end - self._lost_at
+            self._lost_at = None
             self.connected.emit()
             self._refresh()
-            self.start_polling()
+            if self._polled:
+                self.start_polling()
+            self._prefetch_timer.start(self.PREFETCH_DELAY_MS)
+            self.connect_stats.emit(end - start, time.perf_counter() - start, downtime)
         except usb.NoDeviceError:
             self.disconnect()
         except:
@@ -86,230 +163,569 @@ class Pad(QObject):
     @Slot()
     def disconnect(self):
         self.stop_polling()
+        self._prefetch_timer.stop()
         self.usb.disconnect()
+        if self._open:
+            self._open = False
+            self._lost_at = time.perf_counter()
         self.disconnected.emit()
 
+    def device_arrived(self, device_id: usb.DeviceId, port: tuple[int, ...]):
+        """Reconnects if it is this pad being plugged in again. Can be called from any thread."""
+        self._device_arrived.emit(device_id, port)
+
+    def device_left(self, device_id: usb.DeviceId):
+        """Disconnects if it is this pad being unplugged. Can be called from any thread."""
+        self._device_left.emit(device_id)
+
+    @Slot(object, object)
+    def _on_device_arrived(self, device_id: usb.DeviceId, port: tuple[int, ...]):
+        if self.usb.opened_id is not None:
+            return
+        # Replugging changes the address but not the port, so a pad that is
+        # plugged into the port it was on follows it to the new address.
+        if self.usb.device_id not in (None, device_id) and port == self.usb.port:
+            old_id, self.usb.device_id = self.usb.device_id, device_id
+            self.device_moved.emit(str(old_id), str(device_id))
+        if self.usb.device_id in (None, device_id):
+            self.connect()
+
+    @Slot(object)
+    def _on_device_left(self, device_id: usb.DeviceId):
+        if self.usb.opened_id == device_id:
+            self.disconnect()
+
+    # The read_* and write_* methods talk to the pad and return the result.
+    # They raise usb.Error and can be used without a thread or signals.
+
+    def read_info(self) -> int:
+        with self.usb.lock:
+            response = self.usb.send_view(protocol.INFO.pack())
+            (serial,) = protocol.INFO.unpack_from(response)
+        return serial
+
     @Slot()
     @handle_errors
     def get_info(self):
-        response = self.usb.send(struct.pack('< B', 0x00))
-        (serial,) = struct.unpack('< x xx I 25x', response)
+        serial = self.read_info()
         self.serial.emit(serial)
+        # Tells the pads apart when there are several.
+        device_id = self.usb.device_id
+        self.identity.emit('' if device_id is None else str(device_id), serial)
+
+    def read_alias(self) -> str:
+        with self.usb.lock:
+            response = self.usb.send_view(protocol.ALIAS.pack())
+            return self._decode_alias(response)
+
+    @staticmethod
+    def _decode_alias(response: bytes | memoryview) -> str:
+        (alias,) = protocol.ALIAS.unpack_from(response)
+        return alias.decode('utf-8', errors='replace').strip('\x00')
+
+    def write_alias(self, alias: str):
+        alias_bytes = alias.encode('utf-8')
+        if len(alias_bytes) > 30:
+            raise ValueError('alias must be at most 30 bytes')
+        if len(alias_bytes) == 0:
+            alias_bytes = b'Unnamed'
+        self.usb.send(protocol.SET_ALIAS.pack(alias_bytes))
 
     @Slot()
     @handle_errors
     def get_alias(self):
-        response = self.usb.send(struct.pack('< B', 0x10))
-        (alias,) = struct.unpack('< x 30s x', response)
-        alias = alias.decode('utf-8', errors='replace').strip('\x00')
-        self.alias.emit(alias)
+        self.alias.emit(self.read_alias())
 
     @Slot(str)
     @handle_errors
     def set_alias(self, alias: str):
-        alias_bytes = alias.encode('utf-8')
-        if len(alias_bytes) > 30:
-            raise ValueError('alias must be at most 30 bytes')
-        if len(alias_bytes) == 0:
-            alias_bytes = b'Unnamed'
-        self.usb.send(struct.pack('< B 30s', 0x11, alias_bytes))
+        self.write_alias(alias)
         self.alias.emit(alias)
 
+    def read_changes(self) -> Changes:
+        with self.usb.lock:
+            response = self.usb.send_view(protocol.CHANGES.pack())
+            (flags,) = protocol.CHANGES.unpack_from(response)
+        return Changes(flags)
+
+    def write_save_changes(self, changes: Changes):
+        self.usb.send(protocol.SAVE_CHANGES.pack(changes.value))
+
+    def write_revert_changes(self, changes: Changes):
+        self.usb.send(protocol.REVERT_CHANGES.pack(changes.value))
+
     @Slot()
     @handle_errors
     def get_changes(self):
-        response = self.usb.send(struct.pack('< B', 0x30))
-        (flags,) = struct.unpack('< x B 30x', response)
-        self.changes.emit(Changes(flags))
+        self.changes.emit(self.read_changes())
 
     @Slot(Changes)
-    @throttle_key(lambda changes: changes)
     @handle_errors
     def save_changes(self, changes: Changes):
-        self.usb.send(struct.pack('< BB', 0x31, changes.value))
+        self.write_save_changes(changes)
         self.changes.emit(Changes(0))
 
     @Slot(Changes)
-    @throttle_key(lambda changes: changes)
     @handle_errors
     def revert_changes(self, changes: Changes):
-        self.usb.send(struct.pack('< BB', 0x32, changes.value))
+        self.write_revert_changes(changes)
         self.changes.emit(Changes(0))
         if changes & Changes.Alias:
             self.get_alias()
         if changes & Changes.HidMode:
             self.get_hidmode()
         if changes & Changes.Profile:
+            self.state.forget(changes)
             self.get_profile()
-            for panel in PanelId:
-                self.get_sensitivity(panel)
-                self.get_ranges(panel)
-                self.get_curve(panel)
+            self.panel_settings.emit(self.state.get_panels(self.read_panel_settings))
+            self._prefetch_timer.start(self.PREFETCH_DELAY_MS)
+
+    def read_hidmode(self) -> HidMode:
+        with self.usb.lock:
+            response = self.usb.send_view(protocol.HIDMODE.pack())
+            (hidmode,) = protocol.HIDMODE.unpack_from(response)
+        return HidMode(hidmode)
+
+    def write_hidmode(self, mode: HidMode):
+        self.usb.send(protocol.SET_HIDMODE.pack(mode.value))
 
     @Slot()
     @handle_errors
     def get_hidmode(self):
-        response = self.usb.send(struct.pack('< B', 0x50))
-        (hidmode,) = struct.unpack('< x B 30x', response)
-        self.hidmode.emit(HidMode(hidmode))
+        self.hidmode.emit(self.read_hidmode())
 
     @Slot(HidMode)
     @throttle_key(lambda mode: mode)
     @handle_errors
     def set_hidmode(self, mode: HidMode):
-        self.usb.send(struct.pack('< BB', 0x51, mode.value))
+        self.write_hidmode(mode)
         self.hidmode.emit(mode)
 
+    def read_profile(self) -> ProfileId:
+        with self.usb.lock:
+            response = self.usb.send_view(protocol.PROFILE.pack())
+            (profile,) = protocol.PROFILE.unpack_from(response)
+        return ProfileId(profile)
+
+    def write_profile(self, profile: ProfileId):
+        self.usb.send(protocol.SET_PROFILE.pack(profile.value))
+
     @Slot()
     @handle_errors
     def get_profile(self):
-        response = self.usb.send(struct.pack('< B', 0x80))
-        (profile,) = struct.unpack('< x B 30x', response)
-        self.profile.emit(ProfileId(profile))
+        self.state.profile = self.read_profile()
+        self.profile.emit(self.state.profile)
 
     @Slot(ProfileId)
-    @throttle_key(lambda profile: profile)
     @handle_errors
     def set_profile(self, profile: ProfileId):
-        self.usb.send(struct.pack('< BB', 0x81, profile.value))
-        self.profile.emit(ProfileId(profile))
-        for panel in PanelId:
-            self.get_sensitivity(panel)
-            self.get_ranges(panel)
-            self.get_curve(panel)
+        self.state.profile = None
+        self.write_profile(profile)
+        self.state.profile = ProfileId(profile)
+        self.profile.emit(self.state.profile)
+        self.panel_settings.emit(self.state.get_panels(self.read_panel_settings))
+
+    def read_panel_settings(self) -> tuple[PanelSettings, ...]:
+        """Reads the settings of every panel in the active profile in one batch."""
+        return self._decode_panel_settings(self.usb.send_many(_PANEL_REQUESTS))
+
+    def read_snapshot(self) -> PadSnapshot:
+        """Reads everything the model shows in one batch."""
+        responses = self.usb.send_many(_SNAPSHOT_REQUESTS)
+        (serial,) = protocol.INFO.unpack_from(responses[0])
+        (hidmode,) = protocol.HIDMODE.unpack_from(responses[2])
+        (changes,) = protocol.CHANGES.unpack_from(responses[3])
+        (profile,) = protocol.PROFILE.unpack_from(responses[4])
+        return PadSnapshot(
+            serial,
+            self._decode_alias(responses[1]),
+            HidMode(hidmode),
+            Changes(changes),
+            ProfileId(profile),
+            self._decode_panel_settings(responses[5:]),
+        )
+
+    def _decode_panel_settings(self, responses: list[bytes]) -> tuple[PanelSettings, ...]:
+        return tuple(
+            PanelSettings(
+                self._decode_sensitivity(sensitivity),
+                self._decode_ranges(ranges),
+                self._decode_curve(curve),
+            )
+            for sensitivity, ranges, curve in itertools.batched(responses, n=3)
+        )
+
+    def read_curve(self, panel: PanelId) -> Curve:
+        with self.usb.lock:
+            response = self.usb.send_view(protocol.CURVE.pack(panel.value))
+            return self._decode_curve(response)
+
+    @staticmethod
+    def _decode_curve(response: bytes | memoryview) -> Curve:
+        below, above, num_points = protocol.CURVE.unpack_from(response)
+        coords = protocol.curve_points(num_points).unpack_from(
+            response, protocol.CURVE_POINTS_OFFSET
+        )
+        # Decoded data from the pad skips the checks for user input.
+        points = tuple(map(CurvePoint.trusted, itertools.batched(coords, n=2)))
+        return Curve.trusted((CurveBand.trusted((below, above)), points))
 
     @Slot(PanelId)
     @throttle_key(lambda panel: panel)
     @handle_errors
     def get_curve(self, panel: PanelId):
-        response = self.usb.send(struct.pack('< BB', 0x86, panel.value))
-        below, above, num_points = struct.unpack('< xx ffB', response[:11])
-        span = response[11:][: (2 * num_points * 4)]
-        coords = struct.unpack(f'< {2 * num_points}f', span)
-        points = [CurvePoint(x, y) for x, y in itertools.batched(coords, n=2)]
-        self.curve.emit(panel, Curve(CurveBand(below, above), points))
+        self.curve.emit(panel, self.state.get(panel, 'curve', self.read_curve))
+
+    def read_readings(self, panel: PanelId) -> Readings:
+        with self.usb.lock:
+            response = self.usb.send_view(_READINGS_REQUESTS[panel.value])
+            return self._decode_readings(panel, response)
+
+    def read_all_readings(self) -> ReadingsBatch:
+        # The firmware has no request for all panels at once, so the four
+        # requests are pipelined.
+        responses = self.usb.send_many(_READINGS_REQUESTS)
+        return ReadingsBatch.from_rows(self._record_readings(time.monotonic(), responses))
 
     @Slot(PanelId)
     @throttle_key(lambda panel: panel)
     @handle_errors
     def get_readings(self, panel: PanelId):
-        response = self.usb.send(struct.pack('< BB', 0x87, panel.value))
-        pressed, x, y, left, right = struct.unpack('< x BffHH 18x', response)
-        self.readings.emit(Readings(panel, pressed != 0, x, y, (left, right)))
+        self.readings.emit(self.read_readings(panel))
+
+    @Slot()
+    @handle_errors
+    def get_all_readings(self):
+        self.all_readings.emit(self.read_all_readings())
+
+    def _record_readings(self, now: float, responses: list[bytes]) -> list[tuple]:
+        """Appends the readings to the history and returns them, decoded once."""
+        rows = [protocol.READINGS.unpack_from(response) for response in responses]
+        for history, (pressed, x, y, left, right) in zip(self.history, rows):
+            history.append(now, pressed != 0, x, y, left, right)
+        return rows
+
+    @staticmethod
+    def _decode_readings(panel: PanelId, response: bytes | memoryview) -> Readings:
+        pressed, x, y, left, right = protocol.READINGS.unpack_from(response)
+        return Readings(panel, pressed != 0, x, y, (left, right))
+
+    def write_add_curve_point(self, panel: PanelId, index: int, p: CurvePoint):
+        self.usb.send(protocol.ADD_CURVE_POINT.pack(panel.value, index, p.x, p.y))
+
+    def write_delete_curve_point(self, panel: PanelId, index: int):
+        self.usb.send(protocol.DELETE_CURVE_POINT.pack(panel.value, index))
+
+    def write_curve_point(self, panel: PanelId, index: int, p: CurvePoint):
+        self.usb.send(protocol.SET_CURVE_POINT.pack(panel.value, index, p.x, p.y))
+
+    def write_reset_curve(self, panel: PanelId):
+        self.usb.send(protocol.RESET_CURVE.pack(panel.value))
+
+    def write_curve(self, panel: PanelId, curve: Curve):
+        self.write_reset_curve(panel)
+        for i, p in enumerate(curve.points):
+            if i < 2:
+                self.write_curve_point(panel, i, p)
+            else:
+                self.write_add_curve_point(panel, i, p)
 
     @Slot(PanelId, int, CurvePoint)
-    @throttle_key(lambda panel, index, p: (panel, index, p))
     @handle_errors
     def add_curve_point(self, panel: PanelId, index: int, p: CurvePoint):
-        self.usb.send(struct.pack('< BBBff', 0x88, panel.value, index, p.x, p.y))
+        self.state.write(
+            panel,
+            'curve',
+            lambda: self.write_add_curve_point(panel, index, p),
+            with_point_added(index, p),
+        )
 
     @Slot(PanelId, int)
-    @throttle_key(lambda panel, index: (panel, index))
     @handle_errors
     def delete_curve_point(self, panel: PanelId, index: int):
-        self.usb.send(struct.pack('< BBB', 0x89, panel.value, index))
+        self.state.write(
+            panel,
+            'curve',
+            lambda: self.write_delete_curve_point(panel, index),
+            with_point_deleted(index),
+        )
 
     @Slot(PanelId, int, CurvePoint)
     @throttle_key(lambda panel, index, _: (panel, index))
     @handle_errors
     def set_curve_point(self, panel: PanelId, index: int, p: CurvePoint):
-        self.usb.send(struct.pack('< BBBff', 0x8A, panel.value, index, p.x, p.y))
+        self.state.write(
+            panel,
+            'curve',
+            lambda: self.write_curve_point(panel, index, p),
+            with_point_set(index, p),
+        )
 
     @Slot(PanelId)
-    @throttle_key(lambda panel: panel)
     @handle_errors
     def reset_curve(self, panel: PanelId):
-        self.usb.send(struct.pack('< BB', 0x8B, panel.value))
+        # The default curve is up to the firmware, so it is read back.
+        self.state.write(panel, 'curve', lambda: self.write_reset_curve(panel), lambda _: None)
         self.get_curve(panel)
 
     @Slot(PanelId, Curve)
-    @throttle_key(lambda panel, _: panel)
     @handle_errors
     def set_curve(self, panel: PanelId, curve: Curve):
-        self.usb.send(struct.pack('< BB', 0x8B, panel.value))
-        for i, p in enumerate(curve.points):
-            if i < 2:
-                self.usb.send(struct.pack('< BBBff', 0x8A, panel.value, i, p.x, p.y))
-            else:
-                self.usb.send(struct.pack('< BBBff', 0x88, panel.value, i, p.x, p.y))
+        self.state.write(panel, 'curve', lambda: self.write_curve(panel, curve), lambda _: curve)
         self.get_curve(panel)
 
+    def read_sensitivity(self, panel: PanelId) -> Sensitivity:
+        with self.usb.lock:
+            response = self.usb.send_view(protocol.SENSITIVITY.pack(panel.value))
+            return self._decode_sensitivity(response)
+
+    @staticmethod
+    def _decode_sensitivity(response: bytes | memoryview) -> Sensitivity:
+        return Sensitivity.trusted(protocol.SENSITIVITY.unpack_from(response))
+
+    def write_sensitivity(self, panel: PanelId, sensitivity: Sensitivity):
+        self.usb.send(protocol.SET_SENSITIVITY.pack(panel.value, sensitivity.sensitivity))
+
     @Slot(PanelId)
     @throttle_key(lambda panel: panel)
     @handle_errors
     def get_sensitivity(self, panel: PanelId):
-        response = self.usb.send(struct.pack('< BB', 0x90, panel.value))
-        (sensitivity,) = struct.unpack('< x H 29x', response)
-        self.sensitivity.emit(panel, Sensitivity(sensitivity))
+        self.sensitivity.emit(panel, self.state.get(panel, 'sensitivity', self.read_sensitivity))
 
     @Slot(PanelId, Sensitivity)
     @throttle_key(lambda panel, _: panel)
     @handle_errors
     def set_sensitivity(self, panel: PanelId, sensitivity: Sensitivity):
-        self.usb.send(struct.pack('< BBH', 0x91, panel.value, sensitivity.sensitivity))
+        self.state.write(
+            panel,
+            'sensitivity',
+            lambda: self.write_sensitivity(panel, sensitivity),
+            lambda _: sensitivity,
+        )
+
+    def read_band(self, panel: PanelId) -> CurveBand:
+        with self.usb.lock:
+            response = self.usb.send_view(protocol.BAND.pack(panel.value))
+            return CurveBand.trusted(protocol.BAND.unpack_from(response))
+
+    def write_band(self, panel: PanelId, band: CurveBand):
+        self.usb.send(protocol.SET_BAND.pack(panel.value, band.below, band.above))
 
     @Slot(PanelId)
     @throttle_key(lambda panel: panel)
     @handle_errors
     def get_band(self, panel: PanelId):
-        response = self.usb.send(struct.pack('< BB', 0x92, panel.value))
-        below, above = struct.unpack('< x ff 15x', response)
-        self.band.emit(panel, CurveBand(below, above))
+        self.band.emit(panel, self.read_band(panel))
 
     @Slot(PanelId, CurveBand)
     @throttle_key(lambda panel, _: panel)
     @handle_errors
     def set_band(self, panel: PanelId, band: CurveBand):
-        self.usb.send(struct.pack('< BBff', 0x93, panel.value, band.below, band.above))
+        self.state.write(panel, 'curve', lambda: self.write_band(panel, band), with_band(band))
+
+    def read_ranges(self, panel: PanelId) -> tuple[SensorRange, SensorRange]:
+        with self.usb.lock:
+            response = self.usb.send_view(protocol.RANGES.pack(panel.value))
+            return self._decode_ranges(response)
+
+    @staticmethod
+    def _decode_ranges(response: bytes | memoryview) -> tuple[SensorRange, SensorRange]:
+        lmin, lmax, rmin, rmax = protocol.RANGES.unpack_from(response)
+        return (SensorRange.trusted((lmin, lmax)), SensorRange.trusted((rmin, rmax)))
+
+    def write_ranges(self, panel: PanelId, ranges: tuple[SensorRange, SensorRange]):
+        self.usb.send(
+            protocol.SET_RANGES.pack(
+                panel.value,
+                ranges[0].min,
+                ranges[0].max,
+                ranges[1].min,
+                ranges[1].max,
+            )
+        )
 
     @Slot(PanelId)
     @throttle_key(lambda panel: panel)
     @handle_errors
     def get_ranges(self, panel: PanelId):
-        response = self.usb.send(struct.pack('< BB', 0x94, panel.value))
-        lmin, lmax, rmin, rmax = struct.unpack('< x HHHH 23x', response)
-        self.ranges.emit(panel, (SensorRange(lmin, lmax), SensorRange(rmin, rmax)))
+        self.ranges.emit(panel, self.state.get(panel, 'ranges', self.read_ranges))
 
     @Slot(PanelId, tuple)
     @throttle_key(lambda panel, _: panel)
     @handle_errors
     def set_ranges(self, panel: PanelId, ranges: tuple[SensorRange, SensorRange]):
-        self.usb.send(
-            struct.pack(
-                '< BBHHHH',
-                0x95,
-                panel.value,
-                ranges[0].min,
-                ranges[0].max,
-                ranges[1].min,
-                ranges[1].max,
-            )
+        self.state.write(
+            panel, 'ranges', lambda: self.write_ranges(panel, ranges), lambda _: ranges
         )
 
+    @Slot(float)
+    def set_poll_rate(self, rate: float):
+        """Sets the polling rate in Hz. Zero means the default, or unlimited when streaming."""
+        self._poll_rate = rate
+        self.poll_timer.setInterval(max(1, round(1000 / rate)) if rate else self.POLL_INTERVAL_MS)
+        self._restart_polling()
+
+    @Slot(bool)
+    def set_streaming(self, streaming: bool):
+        self._streaming = streaming
+        self._restart_polling()
+
+    @Slot(bool)
+    def set_polled(self, polled: bool):
+        """Sets whether the pad is polled while connected. Only the pad shown is."""
+        self._polled = polled
+        if not polled:
+            self.stop_polling()
+        elif self._open and not self.poll_timer.isActive() and self._streamer is None:
+            self.start_polling()
+
     @Slot()
     def start_polling(self):
-        self.poll_timer.start()
+        if self._streaming:
+            self._stop_streamer.clear()
+            self._streamer = threading.Thread(target=self._stream, name='Pad stream', daemon=True)
+            self._streamer.start()
+        else:
+            self.poll_timer.start()
 
     @Slot()
     def stop_polling(self):
         self.poll_timer.stop()
+        if self._streamer is not None:
+            self._stop_streamer.set()
+            self._streamer.join()
+            self._streamer = None
+            # Prefetching was skipped while streaming.
+            if self._open:
+                self._prefetch_timer.start(self.PREFETCH_DELAY_MS)
+
+    def _restart_polling(self):
+        if self.poll_timer.isActive() or self._streamer is not None:
+            self.stop_polling()
+            self.start_polling()
+
+    def _stream(self):
+        # Runs on its own thread and reads as fast as the link allows. Every
+        # sample goes to history, the display only gets SampleClock's share.
+        requests = _READINGS_REQUESTS
+        period = 1.0 / self._poll_rate if self._poll_rate else 0.0
+        clock = SampleClock()
+        deadline = time.monotonic()
+        while not self._stop_streamer.is_set():
+            try:
+                responses = self.usb.send_many(requests, self.STREAM_TIMEOUT)
+            except usb.NoDeviceError as e:
+                print(str(e))
+                self.error.emit(str(e))
+                self._stream_lost.emit()
+                return
+            except usb.Error:
+                # Late responses to this batch are flushed before the next one.
+                clock.drop(len(requests))
+                responses = None
+
+            now = time.monotonic()
+            if responses is not None:
+                rows = self._record_readings(now, responses)
+                if clock.sample(now, len(rows)):
+                    self.all_readings.emit(ReadingsBatch.from_rows(rows))
+            if (report := clock.report(now)) is not None:
+                self.stream_stats.emit(*report)
+
+            if period:
+                deadline = max(deadline + period, now)
+                self._stop_streamer.wait(deadline - now)
 
     @Slot()
     def _poll(self):
-        for panel in PanelId:
-            self.get_readings(panel)
+        self.get_all_readings()
+
+    @Slot()
+    def get_metrics(self):
+        cache = {'hits': self.state.hits, 'misses': self.state.misses}
+        self.metrics.emit(self.usb.metrics.snapshot() | {'cache': cache})
 
+    @Slot()
+    def reset_metrics(self):
+        self.usb.metrics.reset()
+        self.state.hits = self.state.misses = 0
+
+    @Slot()
+    @handle_errors
+    def _prefetch(self):
+        # Reads one of the other profiles into the cache, so that selecting it
+        # later needs no reads. The firmware can only read the active profile,
+        # so this switches to it and back while holding the lock. Commands
+        # queued meanwhile run before the next profile is read. Not done while
+        # streaming, which would stall on the lock for the whole time.
+        if self._streamer is not None:
+            return
+        active = self.state.profile
+        missing = [profile for profile in self.state.missing() if profile != active]
+        if active is None or not missing:
+            return
+        # Waits for a poll that is due before the reads would be done.
+        busy_ms = 16 * self.usb.metrics.recent_ns / 1e6
+        if self.poll_timer.isActive() and self.poll_timer.interval() > busy_ms:
+            remaining = self.poll_timer.remainingTime()
+            if remaining < busy_ms:
+                self._prefetch_timer.start(remaining + 1)
+                return
+        profile = missing[0]
+        with self.usb.lock:
+            self.state.profile = None
+            try:
+                self.write_profile(profile)
+                panels = self.read_panel_settings()
+            except usb.Error:
+                self._restore_profile(active)
+                raise
+            self._restore_profile(active)
+        self.state.set_panels(panels, profile)
+        if len(missing) > 1:
+            self._prefetch_timer.start(self.PREFETCH_DELAY_MS)
+
+    def _restore_profile(self, profile: ProfileId):
+        # Switches back after prefetching. If that fails, the pad may be left
+        # on the prefetched profile, so the profile it is on is read and shown
+        # instead. If even that fails, the pad is treated as gone, so that
+        # handle_errors disconnects once the lock is released, and connecting
+        # again reads everything.
+        try:
+            self.write_profile(profile)
+            self.state.profile = profile
+            return
+        except usb.NoDeviceError:
+            raise
+        except usb.Error as e:
+            print(str(e))
+            self.error.emit(str(e))
+        try:
+            self.state.profile = self.read_profile()
+            self.profile.emit(self.state.profile)
+            self.panel_settings.emit(self.state.get_panels(self.read_panel_settings))
+        except usb.NoDeviceError:
+            raise
+        except usb.Error as e:
+            raise usb.NoDeviceError(str(e)) from e
+
+    @handle_errors
     def _refresh(self):
-        self.get_info()
-        self.get_alias()
-        self.get_profile()
-        self.get_hidmode()
-        for panel in PanelId:
-            self.get_sensitivity(panel)
-            self.get_ranges(panel)
-            self.get_curve(panel)
-        self.get_changes()
+        # One pipelined batch and one signal instead of a request and a
+        # signal per setting.
+        self.state.clear()
+        snapshot = self.read_snapshot()
+        self.state.profile = snapshot.profile
+        self.state.set_panels(snapshot.panels)
+        device_id = self.usb.device_id
+        self.identity.emit('' if device_id is None else str(device_id), snapshot.serial)
+        self.snapshot.emit(snapshot)
 
     @Slot()
     def quit(self):
-        self._thread.quit()
+        self.stop_polling()
+        self._prefetch_timer.stop()
+        if self.usb.recorder is not None:
+            self.usb.recorder.close()
+        if self._thread is not None:
+            self._thread.quit()
@@ -0,0 +1,167 @@
+"""What the pad thread knows of the panel settings of each profile.
+
+Pad reads a setting once and answers later requests for it from here.
+Writes that succeed update the setting in place, so switching back to a
+profile seen before needs no reads at all. Only the connected app changes
+the settings, so nothing here expires. It is all forgotten on connect and
+by reverting the profile changes.
+"""
+
+from collections.abc import Callable
+from typing import TypeVar
+
+from datatypes import (
+    Changes,
+    Curve,
+    CurveBand,
+    CurvePoint,
+    PanelId,
+    PanelSettings,
+    ProfileId,
+    Sensitivity,
+    SensorRange,
+)
+
+_T = TypeVar('_T')
+
+
+class _Panel:
+    def __init__(self):
+        self.sensitivity: Sensitivity | None = None
+        self.ranges: tuple[SensorRange, SensorRange] | None = None
+        self.curve: Curve | None = None
+
+    def settings(self) -> PanelSettings | None:
+        if self.sensitivity is None or self.ranges is None or self.curve is None:
+            return None
+        return PanelSettings(self.sensitivity, self.ranges, self.curve)
+
+
+class PadState:
+    """Panel settings of all four profiles, keyed by ProfileId and PanelId.
+
+    Lookups and writes go to the active profile. While it is unknown,
+    nothing is kept.
+    """
+
+    def __init__(self):
+        # Requests answered from here and requests that had to be read.
+        self.hits = 0
+        self.misses = 0
+        self.clear()
+
+    def clear(self):
+        self.profile: ProfileId | None = None
+        self._forget_profiles()
+
+    def forget(self, changes: Changes):
+        """Forgets the settings that reverting `changes` restores."""
+        if Changes.Profile in changes:
+            self._forget_profiles()
+
+    def _forget_profiles(self):
+        self._profiles = {profile: {panel: _Panel() for panel in PanelId} for profile in ProfileId}
+
+    def get(self, panel: PanelId, name: str, read: Callable[[PanelId], _T]) -> _T:
+        """Returns a setting of a panel, calling `read` if it is not known."""
+        state = self._panel(panel)
+        value = getattr(state, name) if state is not None else None
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = read(panel)
+        if state is not None:
+            setattr(state, name, value)
+        return value
+
+    def get_panels(
+        self, read: Callable[[], tuple[PanelSettings, ...]]
+    ) -> tuple[PanelSettings, ...]:
+        """Returns the settings of every panel, calling `read` unless all are known."""
+        if self.profile is not None:
+            panels = tuple(state.settings() for state in self._profiles[self.profile].values())
+            if all(settings is not None for settings in panels):
+                self.hits += 1
+                return panels  # pyright: ignore[reportReturnType]
+        self.misses += 1
+        panels = read()
+        self.set_panels(panels)
+        return panels
+
+    def set_panels(self, panels: tuple[PanelSettings, ...], profile: ProfileId | None = None):
+        """Sets the settings of every panel of `profile`, by default the active one."""
+        if profile is None:
+            profile = self.profile
+        if profile is None:
+            return
+        for state, settings in zip(self._profiles[profile].values(), panels):
+            state.sensitivity, state.ranges, state.curve = settings
+
+    def missing(self) -> list[ProfileId]:
+        """Returns the profiles with panel settings that are not all known."""
+        return [
+            profile
+            for profile, panels in self._profiles.items()
+            if any(state.settings() is None for state in panels.values())
+        ]
+
+    def write(
+        self,
+        panel: PanelId,
+        name: str,
+        write: Callable[[], None],
+        update: Callable[[_T | None], _T | None],
+    ):
+        """Calls `write`, then sets a setting of a panel to `update` of what it was.
+
+        The setting is unknown while writing, so it is read again if the
+        write fails halfway.
+        """
+        state = self._panel(panel)
+        if state is None:
+            write()
+            return
+        value = getattr(state, name)
+        setattr(state, name, None)
+        write()
+        setattr(state, name, update(value))
+
+    def _panel(self, panel: PanelId) -> _Panel | None:
+        if self.profile is None:
+            return None
+        return self._profiles[self.profile][panel]
+
+
+# Updates of a known curve for PadState.write. Unknown curves stay unknown.
+# They run after the pad has accepted the write, so the result is trusted
+# rather than validated, which could fail with the write already done.
+
+
+def with_band(band: CurveBand) -> Callable[[Curve | None], Curve | None]:
+    return lambda curve: None if curve is None else Curve.trusted((band, curve.points))
+
+
+def with_point_added(index: int, p: CurvePoint) -> Callable[[Curve | None], Curve | None]:
+    return _with_points(lambda points: points.insert(index, p))
+
+
+def with_point_deleted(index: int) -> Callable[[Curve | None], Curve | None]:
+    return _with_points(lambda points: points.pop(index))
+
+
+def with_point_set(index: int, p: CurvePoint) -> Callable[[Curve | None], Curve | None]:
+    return _with_points(lambda points: points.__setitem__(index, p))
+
+
+def _with_points(
+    edit: Callable[[list[CurvePoint]], object],
+) -> Callable[[Curve | None], Curve | None]:
+    def update(curve: Curve | None) -> Curve | None:
+        if curve is None:
+            return None
+        points = list(curve.points)
+        edit(points)
+        return Curve.trusted((curve.band, tuple(points)))
+
+    return update
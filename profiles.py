@@ -0,0 +1,249 @@
+"""Exporting pad settings and applying them with as few writes as possible.
+
+Applying reads the current settings once and only sends the writes that
+change something. Curves are edited point by point instead of being reset
+and sent again, unless resetting takes fewer writes.
+"""
+
+import struct
+from collections.abc import Iterable, Sequence
+from typing import NamedTuple
+
+from datatypes import (
+    Curve,
+    CurveBand,
+    CurvePoint,
+    HidMode,
+    PadSettings,
+    PanelId,
+    PanelSettings,
+    ProfileId,
+    Sensitivity,
+    SensorRange,
+)
+from pad import Pad
+
+
+class Write(NamedTuple):
+    """A call of one of the Pad.write_* methods."""
+
+    method: str
+    args: tuple
+
+    def __str__(self):
+        return f'{self.method}({", ".join(_format(arg) for arg in self.args)})'
+
+
+def read_profile(pad: Pad, panels: Iterable[PanelId] = PanelId) -> dict[PanelId, PanelSettings]:
+    """Reads the settings of the active profile, all panels in one batch."""
+    settings = pad.read_panel_settings()
+    return {panel: settings[panel.value] for panel in panels}
+
+
+def read_settings(pad: Pad, profiles: Sequence[ProfileId] = tuple(ProfileId)) -> PadSettings:
+    """Reads the given profiles, switching to each and back to the active one."""
+    active = pad.read_profile()
+    settings = PadSettings(pad.read_alias(), pad.read_hidmode(), active, {})
+    current = active
+    for profile in _profile_order(profiles, active, active):
+        if profile != current:
+            pad.write_profile(profile)
+            current = profile
+        settings.profiles[profile] = read_profile(pad)
+    if current != active:
+        pad.write_profile(active)
+    return settings
+
+
+def apply_settings(pad: Pad, settings: PadSettings, dry_run: bool = False) -> list[Write]:
+    """Changes the pad's settings to `settings` and returns the writes that were needed.
+
+    Profile switches are included. With `dry_run` nothing is written and
+    the writes are only returned. The firmware only reads the active
+    profile, so the pad still switches to each other profile to read it,
+    and back to the profile it started on, also if reading fails.
+    """
+    writes = list[Write]()
+
+    def write(method: str, *args):
+        writes.append(Write(method, args))
+        if not dry_run:
+            getattr(pad, method)(*args)
+
+    if settings.alias is not None and settings.alias != pad.read_alias():
+        write('write_alias', settings.alias)
+    if settings.hidmode is not None and settings.hidmode != pad.read_hidmode():
+        write('write_hidmode', settings.hidmode)
+
+    active = pad.read_profile()
+    last = active if settings.profile is None else settings.profile
+    current = active
+    # The profile the pad is on during a dry run.
+    read = active
+    try:
+        for profile in _profile_order(settings.profiles, active, last):
+            if profile != current:
+                write('write_profile', profile)
+                current = profile
+            if dry_run and profile != read:
+                pad.write_profile(profile)
+                read = profile
+            target = settings.profiles[profile]
+            for w in plan_profile(read_profile(pad, target), target):
+                write(w.method, *w.args)
+        if current != last:
+            write('write_profile', last)
+    finally:
+        if read != active:
+            pad.write_profile(active)
+    return writes
+
+
+def plan_profile(
+    current: dict[PanelId, PanelSettings], target: dict[PanelId, PanelSettings]
+) -> list[Write]:
+    """Returns the writes that change the active profile from `current` to `target`."""
+    writes = list[Write]()
+    for panel, settings in target.items():
+        old = current[panel]
+        if settings.sensitivity != old.sensitivity:
+            writes.append(Write('write_sensitivity', (panel, settings.sensitivity)))
+        if settings.ranges != old.ranges:
+            writes.append(Write('write_ranges', (panel, settings.ranges)))
+        curve_writes = plan_curve(panel, old.curve.points, settings.curve.points)
+        writes += curve_writes
+        # A reset may restore the default band as well.
+        band = old.curve.band
+        if curve_writes and curve_writes[0].method == 'write_reset_curve':
+            band = Curve.default().band
+        if _single(settings.curve.band) != _single(band):
+            writes.append(Write('write_band', (panel, settings.curve.band)))
+    return writes
+
+
+def plan_curve(
+    panel: PanelId, current: Sequence[CurvePoint], target: Sequence[CurvePoint]
+) -> list[Write]:
+    """Returns the point edits that turn the `current` curve into `target`.
+
+    Points are kept in order of x after every edit, as when dragging them.
+    """
+    edits = _curve_edits(panel, current, target)
+    reset = [Write('write_reset_curve', (panel,))]
+    reset += _curve_edits(panel, Curve.default().points, target)
+    return edits if len(edits) <= len(reset) else reset
+
+
+def _curve_edits(
+    panel: PanelId, current: Sequence[CurvePoint], target: Sequence[CurvePoint]
+) -> list[Write]:
+    # Pairs up the points like an edit distance would, preferring pairs of
+    # equal points, then as many pairs as possible. Paired points are moved,
+    # the others deleted or inserted.
+    n, m = len(current), len(target)
+    best = [[(0, 0)] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            score, pairs = best[i - 1][j - 1]
+            same = _single(current[i - 1]) == _single(target[j - 1])
+            best[i][j] = max(best[i - 1][j], best[i][j - 1], (score + 1 + same, pairs + 1))
+    pairs = list[tuple[int, int]]()
+    i, j = n, m
+    while i and j:
+        if best[i][j] == best[i - 1][j]:
+            i -= 1
+        elif best[i][j] == best[i][j - 1]:
+            j -= 1
+        else:
+            i, j = i - 1, j - 1
+            pairs.append((i, j))
+    pairs.reverse()
+
+    writes = list[Write]()
+    paired_current = {i for i, _ in pairs}
+    for i in reversed(range(n)):
+        if i not in paired_current:
+            writes.append(Write('write_delete_curve_point', (panel, i)))
+
+    # Points moving left are moved left to right and the others right to left,
+    # so no point passes its neighbours.
+    moves = [
+        (index, current[i], target[j])
+        for index, (i, j) in enumerate(pairs)
+        if _single(current[i]) != _single(target[j])
+    ]
+    left = [(index, p) for index, old, p in moves if p.x < old.x]
+    right = [(index, p) for index, old, p in reversed(moves) if p.x >= old.x]
+    for index, p in left + right:
+        writes.append(Write('write_curve_point', (panel, index, p)))
+
+    paired_target = {j for _, j in pairs}
+    for j in range(m):
+        if j not in paired_target:
+            writes.append(Write('write_add_curve_point', (panel, j, target[j])))
+    return writes
+
+
+def _profile_order(profiles, first: ProfileId, last: ProfileId) -> list[ProfileId]:
+    # Starting on the active profile and ending on the last one saves switches.
+    return sorted(profiles, key=lambda p: (p != first, p == last, p.value))
+
+
+def _single(values: Sequence[float]) -> bytes:
+    # The pad stores single precision floats.
+    return struct.pack(f'< {len(values)}f', *values)
+
+
+def _format(arg) -> str:
+    if isinstance(arg, (PanelId, ProfileId, HidMode)):
+        return arg.name
+    return repr(arg)
+
+
+def to_json(settings: PadSettings) -> dict:
+    data = dict[str, object]()
+    if settings.alias is not None:
+        data['alias'] = settings.alias
+    if settings.hidmode is not None:
+        data['hidmode'] = settings.hidmode.name
+    if settings.profile is not None:
+        data['profile'] = settings.profile.name
+    data['profiles'] = {
+        profile.name: {
+            panel.name: {
+                'sensitivity': s.sensitivity.sensitivity,
+                'ranges': [list(r) for r in s.ranges],
+                # Rounding hides the noise of single precision floats.
+                'band': [round(v, 6) for v in s.curve.band],
+                'points': [[round(p.x, 6), round(p.y, 6)] for p in s.curve.points],
+            }
+            for panel, s in panels.items()
+        }
+        for profile, panels in settings.profiles.items()
+    }
+    return data
+
+
+def from_json(data: dict) -> PadSettings:
+    """Builds settings from `to_json` output. Raises KeyError or ValueError if invalid."""
+    return PadSettings(
+        data.get('alias'),
+        HidMode[data['hidmode']] if 'hidmode' in data else None,
+        ProfileId[data['profile']] if 'profile' in data else None,
+        {
+            ProfileId[profile]: {PanelId[panel]: _panel_from_json(s) for panel, s in panels.items()}
+            for profile, panels in data.get('profiles', {}).items()
+        },
+    )
+
+
+def _panel_from_json(data: dict) -> PanelSettings:
+    left, right = data['ranges']
+    return PanelSettings(
+        Sensitivity(int(data['sensitivity'])),
+        (SensorRange(*map(int, left)), SensorRange(*map(int, right))),
+        Curve(
+            CurveBand(*map(float, data['band'])),
+            [CurvePoint(float(x), float(y)) for x, y in data['points']],
+        ),
+    )
@@ -0,0 +1,112 @@
+"""Packet layouts of the pad protocol.
+
+Every request starts with its opcode. Responses start with 0x41, or with
+0x45 and the packet count when they span several packets. The transport
+adds and checks the checksum in the last byte, the layouts here cover the
+other 31 bytes of requests and the reassembled data of responses.
+
+The formats are compiled once, so encoding and decoding does not parse
+format strings on every call.
+"""
+
+import functools
+import struct
+from typing import NamedTuple
+
+
+class Command(NamedTuple):
+    name: str
+    opcode: int
+    # Fields after the opcode.
+    request: struct.Struct
+    # None if the pad only acknowledges the request.
+    response: struct.Struct | None
+
+    @property
+    def is_write(self) -> bool:
+        return self.response is None
+
+    def pack(self, *args) -> bytes:
+        return self.request.pack(self.opcode, *args)
+
+    def pack_into(self, buffer, *args):
+        self.request.pack_into(buffer, 0, self.opcode, *args)
+
+    def unpack_from(self, response) -> tuple:
+        assert self.response is not None
+        return self.response.unpack_from(response)
+
+
+def _command(name: str, opcode: int, request: str, response: str | None = None) -> Command:
+    return Command(
+        name,
+        opcode,
+        struct.Struct('< B ' + request),
+        None if response is None else struct.Struct('< ' + response),
+    )
+
+
+# fmt: off
+INFO =               _command('info',               0x00, '',     'x xx I 25x')
+ALIAS =              _command('alias',              0x10, '',     'x 30s x')
+SET_ALIAS =          _command('set_alias',          0x11, '30s')
+CHANGES =            _command('changes',            0x30, '',     'x B 30x')
+SAVE_CHANGES =       _command('save_changes',       0x31, 'B')
+REVERT_CHANGES =     _command('revert_changes',     0x32, 'B')
+HIDMODE =            _command('hidmode',            0x50, '',     'x B 30x')
+SET_HIDMODE =        _command('set_hidmode',        0x51, 'B')
+PROFILE =            _command('profile',            0x80, '',     'x B 30x')
+SET_PROFILE =        _command('set_profile',        0x81, 'B')
+# Followed by the points, see curve_points.
+CURVE =              _command('curve',              0x86, 'B',    'xx ffB')
+READINGS =           _command('readings',           0x87, 'B',    'x BffHH 18x')
+ADD_CURVE_POINT =    _command('add_curve_point',    0x88, 'BBff')
+DELETE_CURVE_POINT = _command('delete_curve_point', 0x89, 'BB')
+SET_CURVE_POINT =    _command('set_curve_point',    0x8A, 'BBff')
+RESET_CURVE =        _command('reset_curve',        0x8B, 'B')
+SENSITIVITY =        _command('sensitivity',        0x90, 'B',    'x H 29x')
+SET_SENSITIVITY =    _command('set_sensitivity',    0x91, 'BH')
+BAND =               _command('band',               0x92, 'B',    'x ff 23x')
+SET_BAND =           _command('set_band',           0x93, 'Bff')
+RANGES =             _command('ranges',             0x94, 'B',    'x HHHH 23x')
+SET_RANGES =         _command('set_ranges',         0x95, 'BHHHH')
+# fmt: on
+
+COMMANDS = {
+    command.opcode: command
+    for command in (
+        INFO,
+        ALIAS,
+        SET_ALIAS,
+        CHANGES,
+        SAVE_CHANGES,
+        REVERT_CHANGES,
+        HIDMODE,
+        SET_HIDMODE,
+        PROFILE,
+        SET_PROFILE,
+        CURVE,
+        READINGS,
+        ADD_CURVE_POINT,
+        DELETE_CURVE_POINT,
+        SET_CURVE_POINT,
+        RESET_CURVE,
+        SENSITIVITY,
+        SET_SENSITIVITY,
+        BAND,
+        SET_BAND,
+        RANGES,
+        SET_RANGES,
+    )
+}
+
+WRITE_OPCODES = frozenset(opcode for opcode, command in COMMANDS.items() if command.is_write)
+
+# Offset of the points in a curve response.
+CURVE_POINTS_OFFSET = CURVE.response.size
+
+
+@functools.cache
+def curve_points(num_points: int) -> struct.Struct:
+    """Layout of `num_points` points, x and y each, in a curve response."""
+    return struct.Struct(f'< {2 * num_points}f')
@@ -0,0 +1,77 @@
+"""Applies the same settings to many pads in parallel."""
+
+import time
+from collections.abc import Collection
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import profiles
+import usb
+from datatypes import PadSettings
+from pad import Pad
+
+
+class Result(NamedTuple):
+    device_id: usb.DeviceId
+    serial: int | None
+    writes: int
+    seconds: float
+    error: str | None
+
+
+def provision(
+    settings: PadSettings,
+    serials: Collection[int] = (),
+    save: bool = False,
+    verify: bool = True,
+) -> list[Result]:
+    """Applies `settings` to every connected pad, or only to those with the given serials.
+
+    Each pad gets its own worker thread and libusb context. Pads with other
+    serials are left out of the results.
+    """
+    device_ids = usb.enumerate_pads()
+    if not device_ids:
+        return []
+    with ThreadPoolExecutor(len(device_ids), thread_name_prefix='Provision') as executor:
+        results = executor.map(
+            lambda device_id: _provision_one(device_id, settings, serials, save, verify),
+            device_ids,
+        )
+        return [result for result in results if result is not None]
+
+
+def _provision_one(
+    device_id: usb.DeviceId,
+    settings: PadSettings,
+    serials: Collection[int],
+    save: bool,
+    verify: bool,
+) -> Result | None:
+    start = time.perf_counter()
+    pad = Pad(transport=usb.Usb(device_id), threaded=False)
+    serial = None
+    writes = 0
+    try:
+        pad.usb.connect()
+        serial = pad.read_info()
+        if serials and serial not in serials:
+            return None
+        writes = len(profiles.apply_settings(pad, settings))
+        if verify:
+            # Planning again must find nothing left to change.
+            remaining = [
+                w
+                for w in profiles.apply_settings(pad, settings, dry_run=True)
+                if w.method != 'write_profile'
+            ]
+            if remaining:
+                raise usb.OtherError(f'Verification failed: {remaining[0]}')
+        if save and (changes := pad.read_changes()):
+            pad.write_save_changes(changes)
+            writes += 1
+        return Result(device_id, serial, writes, time.perf_counter() - start, None)
+    except (usb.Error, ValueError) as e:
+        return Result(device_id, serial, writes, time.perf_counter() - start, str(e))
+    finally:
+        pad.usb.disconnect()
@@ -139,7 +139,7 @@ Page {
             }
 
             Component.onCompleted: {
-                root.panel.dot_changed.connect(function () {
+                root.panel.readings_changed.connect(function () {
                     replace([root.panel.dot]);
                 });
             }
@@ -51,6 +51,11 @@ ApplicationWindow {
         onActivated: root.model.panels[root.focusedPanel].sensitivity -= 0.02
     }
 
+    FrameAnimation {
+        running: root.model.connected
+        onTriggered: root.model.update_readings()
+    }
+
     header: ToolBar {
         topPadding: 8
         bottomPadding: 8
@@ -60,6 +65,19 @@ ApplicationWindow {
         RowLayout {
             anchors.fill: parent
 
+            ComboBox {
+                visible: root.model.devices.length > 1
+                model: root.model.devices
+                currentIndex: root.model.device
+                implicitHeight: 28
+                onActivated: index => root.model.device = index
+
+                hoverEnabled: true
+                ToolTip.visible: hovered
+                ToolTip.delay: 1000
+                ToolTip.text: "Select pad"
+            }
+
             Label {
                 visible: root.model.connected
                 text: "Pad"
@@ -152,13 +170,153 @@ ApplicationWindow {
                             Label {
                                 text: root.model.serial
                             }
+
+                            Label {
+                                text: "Connect time"
+                                rightPadding: 16
+                            }
+
+                            Label {
+                                text: (root.model.connect_time * 1000).toFixed(1) + " ms"
+                            }
+
+                            Label {
+                                text: "Ready in"
+                                rightPadding: 16
+                            }
+
+                            Label {
+                                text: (root.model.ready_time * 1000).toFixed(1) + " ms"
+                            }
+
+                            Label {
+                                text: "Downtime"
+                                rightPadding: 16
+                            }
+
+                            Label {
+                                text: (root.model.downtime * 1000).toFixed(0) + " ms"
+                            }
                         }
 
-                        Button {
+                        RowLayout {
                             Layout.alignment: Qt.AlignTop | Qt.AlignRight
-                            text: "OK"
-                            onClicked: {
-                                padInfo.close();
+                            spacing: 8
+
+                            Button {
+                                text: "Diagnostics"
+                                onClicked: {
+                                    padInfo.close();
+                                    diagnostics.open();
+                                }
+                            }
+
+                            Button {
+                                text: "OK"
+                                onClicked: {
+                                    padInfo.close();
+                                }
+                            }
+                        }
+                    }
+                }
+
+                Popup {
+                    id: diagnostics
+                    parent: Overlay.overlay
+                    anchors.centerIn: parent
+                    modal: true
+                    focus: true
+                    topPadding: 16
+                    bottomPadding: 16
+                    leftPadding: 16
+                    rightPadding: 16
+                    closePolicy: Popup.CloseOnEscape | Popup.CloseOnPressOutside
+
+                    Overlay.modal: Rectangle {
+                        color: "#7f000000"
+                    }
+
+                    function ms(value) {
+                        return value === null || value === undefined ? "> 100" : value.toFixed(2);
+                    }
+
+                    // One cell per label, row by row.
+                    function cells(rows) {
+                        let result = [];
+                        for (let i = 0; i < rows.length; i++) {
+                            const r = rows[i];
+                            result.push(r.name, r.count, r.failed, r.per_second.toFixed(1), ms(r.mean_ms), ms(r.p99_ms));
+                        }
+                        return result;
+                    }
+
+                    Timer {
+                        interval: 1000
+                        running: diagnostics.visible
+                        repeat: true
+                        triggeredOnStart: true
+                        onTriggered: root.model.do_get_metrics()
+                    }
+
+                    ColumnLayout {
+                        spacing: 8
+
+                        GridLayout {
+                            columns: 6
+                            columnSpacing: 16
+
+                            Repeater {
+                                model: ["Request", "Count", "Failed", "Per second", "Mean ms", "p99 ms"]
+                                Label {
+                                    required property string modelData
+                                    text: modelData
+                                    font.bold: true
+                                }
+                            }
+
+                            Repeater {
+                                model: diagnostics.cells(root.model.request_metrics)
+                                Label {
+                                    required property var modelData
+                                    required property int index
+                                    Layout.alignment: index % 6 == 0 ? Qt.AlignLeft : Qt.AlignRight
+                                    text: modelData
+                                }
+                            }
+                        }
+
+                        Label {
+                            readonly property var throttle: root.model.throttle_metrics
+                            visible: throttle.window_ms !== undefined
+                            text: visible ? "Round trip %1 ms, writes every %2 ms, %3 per batch, %4 of %5 calls coalesced".arg(throttle.round_trip_ms.toFixed(2)).arg(throttle.window_ms).arg(throttle.batch || "no limit").arg(throttle.coalesced).arg(throttle.coalesced + throttle.dispatched) : ""
+                        }
+
+                        Label {
+                            readonly property var cache: root.model.cache_metrics
+                            visible: cache.hits !== undefined
+                            text: visible ? "Settings cache: %1 hits, %2 misses".arg(cache.hits).arg(cache.misses) : ""
+                        }
+
+                        Label {
+                            text: root.model.error_metrics.length == 0 ? "No errors" : "Errors: " + root.model.error_metrics.map(e => e.name + " " + e.count).join(", ")
+                        }
+
+                        RowLayout {
+                            Layout.alignment: Qt.AlignRight
+                            spacing: 8
+
+                            Button {
+                                text: "Reset"
+                                onClicked: {
+                                    root.model.do_reset_metrics();
+                                    root.model.do_get_metrics();
+                                }
+                            }
+
+                            Button {
+                                text: "OK"
+                                onClicked: diagnostics.close()
                             }
                         }
                     }
@@ -180,6 +338,20 @@ ApplicationWindow {
                 ToolTip.text: "Disconnect"
             }
 
+            Button {
+                visible: root.model.connected
+                checkable: true
+                checked: root.model.streaming
+                text: root.model.streaming ? root.model.sample_rate.toFixed(0) + " Hz" : "Stream"
+                implicitHeight: 28
+                onToggled: root.model.streaming = checked
+
+                hoverEnabled: true
+                ToolTip.visible: hovered
+                ToolTip.delay: 1000
+                ToolTip.text: root.model.streaming ? "Samples per second, " + root.model.dropped_frames + " dropped" : "Read sensors continuously"
+            }
+
             Button {
                 visible: !root.model.connected
                 text: "Connect"
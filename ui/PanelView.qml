@@ -228,6 +228,19 @@ Page {
             width: parent.width
             topPadding: 24
 
+            TraceView {
+                anchors.left: parent.left
+                anchors.right: parent.right
+                panel: root.panel
+                visible: root.isMaximized
+            }
+
+            Item {
+                width: 1
+                height: 24
+                visible: root.isMaximized
+            }
+
             ColumnLayout {
                 anchors.left: parent.left
                 anchors.right: parent.right
@@ -238,6 +251,7 @@ Page {
                         Layout.fillWidth: true
                         required property int index
                         sensor: root.panel.sensors[index]
+                        level: root.panel.levels[index]
                         isMaximized: root.isMaximized
                     }
                 }
@@ -7,6 +7,7 @@ import Model
 Item {
     id: root
     property Sensor sensor
+    property real level
     property bool isMaximized
 
     implicitHeight: barContainer.implicitHeight
@@ -42,7 +43,7 @@ Item {
                 width: parent.width
                 implicitHeight: 26
                 height: implicitHeight
-                value: root.sensor.level
+                value: root.level
             }
 
             Rectangle {
@@ -90,7 +91,7 @@ Item {
             }
 
             Label {
-                text: (root.sensor.level * 100).toFixed(1)
+                text: (root.level * 100).toFixed(1)
                 anchors.verticalCenter: bar.verticalCenter
                 anchors.left: bar.horizontalCenter
                 width: 36
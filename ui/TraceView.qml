@@ -0,0 +1,94 @@
+import QtGraphs
+import QtQuick
+import QtQuick.Controls
+
+import Model
+
+Item {
+    id: root
+    property Panel panel
+
+    implicitHeight: 120
+
+    GraphsView {
+        id: graph
+        anchors.fill: parent
+        marginBottom: 0
+        marginLeft: 0
+        marginRight: 0
+        marginTop: 0
+
+        theme: GraphsTheme {
+            backgroundVisible: false
+            plotAreaBackgroundColor: palette.active.base
+            grid.mainWidth: 1
+            grid.mainColor: palette.active.light
+            grid.subWidth: 1
+            grid.subColor: palette.active.midlight
+        }
+
+        axisX: ValueAxis {
+            min: -root.panel.trace.window
+            max: 0
+            tickInterval: 1
+            labelsVisible: false
+            lineVisible: false
+            titleVisible: false
+            visible: false
+        }
+
+        axisY: ValueAxis {
+            min: 0
+            max: 1
+            tickInterval: 0.25
+            labelsVisible: false
+            lineVisible: false
+            titleVisible: false
+            visible: false
+        }
+
+        LineSeries {
+            id: pressedSeries
+            color: "#7f7f7f"
+            width: 1
+        }
+
+        LineSeries {
+            id: firstSeries
+            color: palette.active.text
+            width: 1
+        }
+
+        LineSeries {
+            id: secondSeries
+            color: palette.active.highlight
+            width: 1
+        }
+    }
+
+    FrameAnimation {
+        running: root.visible
+        onTriggered: root.panel.trace.update_series(firstSeries, secondSeries, pressedSeries)
+    }
+
+    Row {
+        x: 4
+        y: 4
+        spacing: 8
+
+        Label {
+            text: root.panel.sensors[0].name
+            color: palette.active.text
+        }
+
+        Label {
+            text: root.panel.sensors[1].name
+            color: palette.active.highlight
+        }
+
+        Label {
+            text: "Pressed"
+            color: "#7f7f7f"
+        }
+    }
+}
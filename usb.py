@@ -1,23 +1,46 @@
+import abc
+import contextlib
+import functools
 import os
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
 from ctypes import (
     CDLL,
+    CFUNCTYPE,
     POINTER,
+    Array,
     Structure,
+    addressof,
+    byref,
     c_char,
     c_char_p,
     c_int,
+    c_long,
     c_ssize_t,
     c_uint,
     c_uint8,
     c_uint16,
+    c_uint32,
     c_void_p,
     c_voidp,
+    cast,
     create_string_buffer,
     pointer,
 )
 from datetime import timedelta
-from typing import Sequence
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, NamedTuple, Sequence
+
+import crc
+from metrics import Metrics
+
+if TYPE_CHECKING:
+    from capture import Recorder
+
+# Pads requests that are shorter than a packet.
+_ZEROS = memoryview(bytes(32))
 
 
 class DeviceDescriptor(Structure):
@@ -39,6 +62,46 @@ class DeviceDescriptor(Structure):
     ]
 
 
+class DeviceId(NamedTuple):
+    """Identifies a connected device until it is unplugged."""
+
+    bus: int
+    address: int
+
+    def __str__(self):
+        return f'{self.bus:03}:{self.address:03}'
+
+
+class Transfer(Structure):
+    pass
+
+
+TransferCallback = CFUNCTYPE(None, POINTER(Transfer))
+HotplugCallback = CFUNCTYPE(c_int, c_void_p, c_void_p, c_int, c_void_p)
+
+Transfer._fields_ = [
+    ('dev_handle', c_void_p),
+    ('flags', c_uint8),
+    ('endpoint', c_uint8),
+    ('type', c_uint8),
+    ('timeout', c_uint),
+    ('status', c_int),
+    ('length', c_int),
+    ('actual_length', c_int),
+    ('callback', TransferCallback),
+    ('user_data', c_void_p),
+    ('buffer', POINTER(c_char)),
+    ('num_iso_packets', c_int),
+]
+
+
+class Timeval(Structure):
+    _fields_ = [
+        ('tv_sec', c_long),
+        ('tv_usec', c_long),
+    ]
+
+
 class Error(Exception):
     def __init__(self, *args):
         super().__init__(*args)
@@ -62,6 +125,17 @@ class Error(Exception):
         }.get(code, OtherError)
         return cls(message)
 
+    @staticmethod
+    def _from_status(status: int):
+        return {
+            1: IOError('Transfer failed.'),
+            2: TimeoutError('Transfer timed out.'),
+            3: InterruptedError('Transfer cancelled.'),
+            4: PipeError('Endpoint stalled.'),
+            5: NoDeviceError('No pad connected.'),
+            6: OverflowError('Device sent more data than requested.'),
+        }.get(status, OtherError('Transfer failed.'))
+
 
 # fmt: off
 class IOError(Error): pass
@@ -77,10 +151,166 @@ class InterruptedError(Error): pass
 class NoMemError(Error): pass
 class NotSupportedError(Error): pass
 class OtherError(Error): pass
+# Not from libusb.
+class ChecksumError(IOError): pass
+class PartialTransferError(IOError): pass
+class UnexpectedDataError(OtherError): pass
 # fmt: on
 
+# Errors after which the pad may still send a response, or the rest of one.
+_LATE_RESPONSE_ERRORS = (TimeoutError, IOError, OverflowError, UnexpectedDataError)
+
+
+class _Response:
+    """Reassembles the response to a request from the packets read after it."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.num_packets = 1
+        self.packet_number = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.num_packets - self.packet_number
+
+    def feed(self, packet: bytes | memoryview) -> bool:
+        """Adds a packet, returns True when the response is complete.
+
+        A single-packet response keeps `packet` rather than copying it.
+        """
+        if self.packet_number == 0:
+            if packet[0] == 0x41:
+                self.data = packet
+            elif packet[0] == 0x45:
+                if packet[1] > 2:
+                    raise UnexpectedDataError('Unexpected data received.')
+                self.data = bytearray(packet[:-1])
+                self.num_packets = max(1, packet[1])
+            elif packet[0] == 0x4E:
+                raise OtherError('Pad responded with an error.')
+            else:
+                raise UnexpectedDataError('Unexpected data received.')
+        else:
+            if packet[0] != self.packet_number:
+                raise UnexpectedDataError('Unexpected data received.')
+            self.data += packet[1:-1]
+        self.packet_number += 1
+        return self.remaining <= 0
+
+    def result(self) -> bytes:
+        return bytes(self.data)
+
+    def view(self) -> memoryview:
+        return memoryview(self.data)
+
+
+class _Request:
+    def __init__(self, packet: bytearray, timeout_ms: int):
+        self.future = Future[bytes]()
+        self.packet = packet
+        self.response = _Response()
+        self.timeout_ms = timeout_ms
+        # When the request was written, for the round-trip time.
+        self.start_ns = 0
+
+
+class Transport(abc.ABC):
+    """Request and response framing on top of 32-byte packet transfers.
+
+    Subclasses move the packets. `send_async` and `send_many` fall back to
+    sending one request at a time.
+
+    Responses do not say which request they answer. After a request fails
+    in a way that leaves a response on its way, like a timeout, the next
+    request first reads until the pad stays silent for FLUSH_TIMEOUT.
+    """
+
+    FLUSH_TIMEOUT = timedelta(milliseconds=50)
+
+    def __init__(self):
+        # Held for a whole request, so several threads can share the pad.
+        self.lock = threading.RLock()
+        # Whether responses to earlier requests may still arrive.
+        self._stale = False
+        # Gets a copy of every packet written or read.
+        self.recorder: Recorder | None = None
+        # The pad to talk to, or None for any.
+        self.device_id: DeviceId | None = None
+        self.metrics = Metrics()
+
+    @abc.abstractmethod
+    def connect(self): ...
+
+    @abc.abstractmethod
+    def disconnect(self): ...
+
+    @abc.abstractmethod
+    def bulk_write(self, data: bytes, timeout: timedelta | None = None) -> None: ...
+
+    @abc.abstractmethod
+    def bulk_read(self, timeout: timedelta | None = None) -> bytes | memoryview:
+        """Reads a packet. It may be a view of a buffer that the next read reuses."""
+
+    def send(self, request: bytes, timeout: timedelta | None = None) -> bytes:
+        with self.lock:
+            return bytes(self.send_view(request, timeout))
+
+    def send_view(self, request: bytes, timeout: timedelta | None = None) -> memoryview:
+        """Like `send`, but the response is not copied out of the receive buffer.
 
-class Usb:
+        The view is only valid until the next request, so hold `lock` until
+        done reading it, for example with struct.unpack_from.
+        """
+        with self.lock:
+            if self._stale:
+                self._flush()
+            start = time.perf_counter_ns()
+            try:
+                self.bulk_write(request, timeout)
+                response = _Response()
+                while not response.feed(self.bulk_read(timeout)):
+                    pass
+            except Error as e:
+                if isinstance(e, _LATE_RESPONSE_ERRORS):
+                    self._stale = True
+                if self.recorder is not None:
+                    self.recorder.record_lost()
+                self.metrics.record_error(request[0], e)
+                raise
+            self.metrics.record(request[0], time.perf_counter_ns() - start)
+            return response.view()
+
+    def send_async(self, request: bytes, timeout: timedelta | None = None) -> Future[bytes]:
+        future = Future[bytes]()
+        try:
+            future.set_result(self.send(request, timeout))
+        except Error as e:
+            future.set_exception(e)
+        return future
+
+    def send_many(self, requests: Iterable[bytes], timeout: timedelta | None = None) -> list[bytes]:
+        with self.lock:
+            return self.gather([self.send_async(request, timeout) for request in requests])
+
+    def gather(self, futures: Sequence[Future[bytes]]) -> list[bytes]:
+        return [future.result() for future in futures]
+
+    def _flush(self):
+        # Discards the late responses, so that they are not taken for the
+        # responses to the next requests.
+        while True:
+            try:
+                self.bulk_read(self.FLUSH_TIMEOUT)
+            except TimeoutError:
+                break
+            except (ChecksumError, PartialTransferError):
+                pass
+        if self.recorder is not None:
+            self.recorder.record_lost()
+        self._stale = False
+
+
+class Usb(Transport):
     context: c_voidp
     device: c_voidp
     libusb: CDLL
@@ -92,43 +322,82 @@ class Usb:
     VENDOR_ID = 0x0483
     PRODUCT_ID = 0x571B
 
-    def __init__(self):
+    # Number of requests written to the pad before the first response is read.
+    MAX_IN_FLIGHT = 4
+
+    TRANSFER_TYPE_BULK = 2
+    TRANSFER_COMPLETED = 0
+
+    def __init__(self, device_id: DeviceId | None = None):
+        """Opens the pad identified by `device_id`, or the first pad found."""
+        super().__init__()
+        self.device_id = device_id
+        # The pad that is open, if any.
+        self.opened_id: DeviceId | None = None
         self.context = c_void_p()
         self.device = c_void_p()
-        if sys.platform == 'win32':
-            self.libusb = CDLL(os.path.dirname(__file__) + '\\libusb-1.0.dll')
-        else:
-            self.libusb = CDLL('libusb-1.0.so.0')
-        Usb._setup_types(self.libusb)
+        # Port path of the pad that was last opened and configured.
+        self._port: tuple[int, ...] | None = None
+        self._callback = TransferCallback(self._on_transfer)
+        self._generation = 0
+        self._idle_transfers = list[tuple[Any, Array[c_char]]]()
+        self._active_transfers = dict[int, tuple[Any, Array[c_char], bool, int]]()
+        self._queued = deque[_Request]()
+        self._pending = deque[_Request]()
+        self._reads = 0
+        # Reused by every synchronous transfer.
+        self._out = create_string_buffer(32)
+        self._in = create_string_buffer(32)
+        self._out_view = memoryview(self._out).cast('B')
+        self._in_view = memoryview(self._in).cast('B')
+        self._transferred = c_int()
+        self.libusb = _load_libusb()
 
     def connect(self):
-        self.disconnect()
-        self.libusb.libusb_init(pointer(self.context))
+        with self.lock:
+            self._connect()
 
+    def _connect(self):
+        self._disconnect()
+
+        # Created on first connect and kept for the lifetime of the object.
+        # Initialising libusb starts threads and scans the bus, too slow to
+        # repeat on every reconnect. Each Usb has its own, so that its thread
+        # only handles the events of its own transfers.
+        if not self.context:
+            self.libusb.libusb_init(pointer(self.context))
         device_list = POINTER(c_voidp)()
-        num_devices = self.libusb.libusb_get_device_list(None, pointer(device_list))
+        num_devices = self.libusb.libusb_get_device_list(self.context, pointer(device_list))
         if num_devices < 0:
             raise OtherError('Error enumerating devices.')
 
         try:
+            # A pad on the port used last time is tried first, it is most
+            # likely the same pad being reconnected.
+            found = None
             for i in range(num_devices):
-                descriptor = DeviceDescriptor()
-                self.libusb.libusb_get_device_descriptor(device_list[i], pointer(descriptor))
-                if (
-                    descriptor.idVendor == self.VENDOR_ID
-                    and descriptor.idProduct == self.PRODUCT_ID
-                ):
-                    self.libusb.libusb_open(device_list[i], pointer(self.device))
-                    break
-            else:
+                device = device_list[i]
+                if not _is_pad(self.libusb, device):
+                    continue
+                if self.device_id is not None and self.device_id != _device_id(self.libusb, device):
+                    continue
+                if found is None or _port_path(self.libusb, device) == self._port:
+                    found = device
+            if found is None:
                 raise NoDeviceError('No pad connected.')
+            self.libusb.libusb_open(found, pointer(self.device))
+            self.opened_id = _device_id(self.libusb, found)
+            port = _port_path(self.libusb, found)
         finally:
             self.libusb.libusb_free_device_list(device_list, 1)
 
+        # The pad keeps its configuration while it stays plugged into the
+        # same port, so reconnecting only checks it after claiming.
         active_config = c_int(-1)
-        self.libusb.libusb_get_configuration(self.device, pointer(active_config))
-        if active_config.value != self.CONFIGURATION:
-            self.libusb.libusb_set_configuration(self.device, self.CONFIGURATION)
+        if port != self._port:
+            self.libusb.libusb_get_configuration(self.device, pointer(active_config))
+            if active_config.value != self.CONFIGURATION:
+                self.libusb.libusb_set_configuration(self.device, self.CONFIGURATION)
 
         try:
             # Raises a NotFoundError if the kernel driver is already detached.
@@ -142,98 +411,260 @@ class Usb:
         self.libusb.libusb_claim_interface(self.device, self.INTERFACE)
         self.libusb.libusb_get_configuration(self.device, pointer(active_config))
         if active_config.value != self.CONFIGURATION:
+            self._port = None
             raise OtherError('Wrong configuration after claiming interface.')
+        self._port = port
+
+    @property
+    def port(self) -> tuple[int, ...] | None:
+        """The port path of the pad connected last, which replugging keeps."""
+        return self._port
 
     def disconnect(self):
+        with self.lock:
+            self._disconnect()
+
+    def _disconnect(self):
         if self.device:
+            self._cancel_transfers(NoDeviceError('No pad connected.'))
+            self._free_transfers()
             try:
                 self.libusb.libusb_release_interface(self.device, self.INTERFACE)
             except Error:
                 pass
             self.libusb.libusb_close(self.device)
             self.device = c_void_p()
-
-        if self.context:
-            self.libusb.libusb_exit(self.context)
-            self.context = c_void_p()
+            self.opened_id = None
 
     def bulk_write(self, data: bytes, timeout: timedelta | None = None) -> None:
         if len(data) > 31:
             raise InvalidParamError('Request too long.')
         if not self.device:
             raise NoDeviceError('No pad connected.')
-        buffer = create_string_buffer(data, 32)
-        buffer[-1] = self._checksum(buffer[:-1])
+        packet = self._out_view
+        packet[: len(data)] = data
+        packet[len(data) :] = _ZEROS[len(data) :]
+        packet[-1] = self._checksum(packet[:-1])
         timeout_ms = 0 if timeout is None else int(1000 * timeout.total_seconds())
-        transferred = c_int(-1)
+        self._transferred.value = -1
         self.libusb.libusb_bulk_transfer(
             self.device,
             self.ENDPOINT_OUT,
-            buffer,
-            len(buffer),
-            pointer(transferred),
-            c_uint(timeout_ms),
+            self._out,
+            32,
+            byref(self._transferred),
+            timeout_ms,
         )
-        if transferred.value != len(buffer):
-            raise IOError('Partial write.')
+        if self.recorder is not None:
+            self.recorder.record_out(self._out.raw)
+        if self._transferred.value != 32:
+            raise PartialTransferError('Partial write.')
 
-    def bulk_read(self, timeout: timedelta | None = None) -> bytes:
+    def bulk_read(self, timeout: timedelta | None = None) -> memoryview:
+        """Reads a packet into the receive buffer and returns a view of it."""
         if not self.device:
             raise NoDeviceError('No pad connected.')
         timeout_ms = 0 if timeout is None else int(1000 * timeout.total_seconds())
-        transferred = c_int(-1)
-        buffer = create_string_buffer(32)
+        self._transferred.value = -1
         self.libusb.libusb_bulk_transfer(
             self.device,
             self.ENDPOINT_IN,
+            self._in,
+            32,
+            byref(self._transferred),
+            timeout_ms,
+        )
+        if self._transferred.value != 32:
+            raise PartialTransferError('Partial read.')
+        if self.recorder is not None:
+            self.recorder.record_in(self._in.raw)
+        packet = self._in_view
+        if packet[-1] != self._checksum(packet[:-1]):
+            raise ChecksumError('Checksum failure.')
+        return packet
+
+    def send_view(self, request: bytes, timeout: timedelta | None = None) -> memoryview:
+        with self.lock:
+            self._drain()
+            return super().send_view(request, timeout)
+
+    def send_async(self, request: bytes, timeout: timedelta | None = None) -> Future[bytes]:
+        """Queues a request and returns a future for its response.
+
+        The pad answers requests in order, so up to MAX_IN_FLIGHT requests
+        are written before their responses are read. The transfers only make
+        progress while `handle_events` or `gather` runs on the calling thread.
+        Hold `lock` until the responses arrive if other threads use the pad.
+        """
+        if len(request) > 31:
+            raise InvalidParamError('Request too long.')
+        if not self.device:
+            raise NoDeviceError('No pad connected.')
+        packet = bytearray(32)
+        packet[: len(request)] = request
+        packet[-1] = self._checksum(packet[:-1])
+        timeout_ms = 0 if timeout is None else int(1000 * timeout.total_seconds())
+        if self._stale and not self._pending and not self._queued:
+            # Cancelled transfers must be done before reading synchronously.
+            self._drain()
+            self._flush()
+        request_ = _Request(packet, timeout_ms)
+        self._queued.append(request_)
+        self._submit()
+        return request_.future
+
+    def gather(self, futures: Sequence[Future[bytes]]) -> list[bytes]:
+        """Handles events until all futures are done and returns their results."""
+        while not all(future.done() for future in futures):
+            self.handle_events(timedelta(milliseconds=100))
+        return [future.result() for future in futures]
+
+    def handle_events(self, timeout: timedelta | None = None) -> None:
+        if not self.context:
+            raise NoDeviceError('No pad connected.')
+        seconds = 0.0 if timeout is None else timeout.total_seconds()
+        tv = Timeval(int(seconds), int(1e6 * (seconds % 1)))
+        self.libusb.libusb_handle_events_timeout(self.context, pointer(tv))
+
+    def _drain(self):
+        while self._active_transfers:
+            self.handle_events(timedelta(milliseconds=100))
+
+    def _submit(self):
+        try:
+            while self._queued and len(self._pending) < self.MAX_IN_FLIGHT:
+                request = self._queued.popleft()
+                self._pending.append(request)
+                request.start_ns = time.perf_counter_ns()
+                self._submit_transfer(self.ENDPOINT_OUT, request.packet, request.timeout_ms)
+            outstanding = sum(request.response.remaining for request in self._pending)
+            while self._reads < outstanding:
+                self._submit_transfer(self.ENDPOINT_IN, None, self._pending[0].timeout_ms)
+                self._reads += 1
+        except Error as e:
+            self._cancel_transfers(e)
+
+    def _submit_transfer(self, endpoint: c_uint8, packet: bytearray | None, timeout_ms: int):
+        if self._idle_transfers:
+            transfer, buffer = self._idle_transfers.pop()
+        else:
+            transfer = self.libusb.libusb_alloc_transfer(0)
+            if not transfer:
+                raise NoMemError('Could not allocate transfer.')
+            buffer = create_string_buffer(32)
+        if packet is not None:
+            buffer.raw = packet
+        t = transfer.contents
+        t.dev_handle = self.device
+        t.flags = 0
+        t.endpoint = endpoint.value
+        t.type = self.TRANSFER_TYPE_BULK
+        t.timeout = timeout_ms
+        t.length = len(buffer)
+        t.actual_length = 0
+        t.callback = self._callback
+        t.user_data = None
+        t.buffer = cast(buffer, POINTER(c_char))
+        t.num_iso_packets = 0
+        try:
+            self.libusb.libusb_submit_transfer(transfer)
+        except Error:
+            self._idle_transfers.append((transfer, buffer))
+            raise
+        self._active_transfers[addressof(t)] = (
+            transfer,
             buffer,
-            len(buffer),
-            pointer(transferred),
-            c_uint(timeout_ms),
+            packet is None,
+            self._generation,
         )
-        if transferred.value != len(buffer):
-            raise IOError('Partial read.')
-        if int.from_bytes(buffer[-1]) != self._checksum(buffer[:-1]):
-            raise IOError('Checksum failure.')
-        return bytes(buffer)
 
-    def send(self, request: bytes, timeout: timedelta | None = None) -> bytes:
-        self.bulk_write(request, timeout)
-        buffer = self.bulk_read(timeout)
-
-        if buffer[0] == 0x41:
-            return buffer
-        elif buffer[0] == 0x45:
-            response = bytearray(buffer[:-1])
-            num_packets = buffer[1]
-            if num_packets > 2:
-                raise OtherError('Unexpected data received.')
-            for packet_number in range(1, num_packets):
-                buffer = self.bulk_read(timeout)
-                if buffer[0] != packet_number:
-                    raise OtherError('Unexpected data received.')
-                response += buffer[1:-1]
-            return bytes(response)
-        elif buffer[0] == 0x4E:
-            raise OtherError('Pad responded with an error.')
+    def _on_transfer(self, transfer_p):
+        # Called by libusb from within handle_events. Exceptions cannot
+        # propagate through libusb, so errors go to the affected futures.
+        transfer, buffer, is_read, generation = self._active_transfers.pop(
+            addressof(transfer_p.contents)
+        )
+        self._idle_transfers.append((transfer, buffer))
+        if generation != self._generation:
+            return
+        t = transfer.contents
+        if is_read:
+            self._reads -= 1
+        if t.status == self.TRANSFER_COMPLETED and t.actual_length != t.length:
+            error = PartialTransferError('Partial read.' if is_read else 'Partial write.')
+        elif t.status != self.TRANSFER_COMPLETED:
+            error = Error._from_status(t.status)
         else:
-            raise OtherError('Unexpected data received.')
+            error = None
+        if self.recorder is not None and t.status == self.TRANSFER_COMPLETED:
+            if is_read:
+                self.recorder.record_in(bytes(buffer))
+            else:
+                self.recorder.record_out(bytes(buffer))
+
+        if not self._pending:
+            return
+        if error is not None:
+            self._cancel_transfers(error)
+            return
+        if not is_read:
+            return
+
+        # The response copies the packet once it is complete, before the
+        # buffer can be reused.
+        packet = memoryview(buffer).cast('B')
+        if packet[-1] != self._checksum(packet[:-1]):
+            self._cancel_transfers(ChecksumError('Checksum failure.'))
+            return
+        request = self._pending[0]
+        try:
+            if request.response.feed(packet):
+                self._pending.popleft()
+                self.metrics.record(request.packet[0], time.perf_counter_ns() - request.start_ns)
+                request.future.set_result(request.response.result())
+        except Error as e:
+            self._cancel_transfers(e)
+            return
+        self._submit()
+
+    def _cancel_transfers(self, error: Error):
+        # A failed transfer leaves requests and responses out of step, so every
+        # outstanding request fails with the same error. Cancelling only stops
+        # the reads, the pad still answers what was written, so the next
+        # request flushes those responses first. An error response to the
+        # only request written leaves nothing to flush.
+        if len(self._pending) > 1 or (self._pending and isinstance(error, _LATE_RESPONSE_ERRORS)):
+            self._stale = True
+        if self._pending and self.recorder is not None:
+            self.recorder.record_lost()
+        requests = list(self._pending) + list(self._queued)
+        self._pending.clear()
+        self._queued.clear()
+        self._reads = 0
+        self._generation += 1
+        for request in requests:
+            if not request.future.done():
+                self.metrics.record_error(request.packet[0], error)
+                request.future.set_exception(error)
+        for transfer, _, _, _ in list(self._active_transfers.values()):
+            self.libusb.libusb_cancel_transfer(transfer)
+
+    def _free_transfers(self):
+        try:
+            self._drain()
+        except Error:
+            pass
+        for transfer, _ in self._idle_transfers:
+            self.libusb.libusb_free_transfer(transfer)
+        self._idle_transfers.clear()
 
     def __del__(self):
         self.disconnect()
+        if self.context:
+            self.libusb.libusb_exit(self.context)
         del self.libusb
 
-    @staticmethod
-    def _checksum(data: Sequence[int]) -> int:
-        result = 0xFFFFFFFF
-        for b in data:
-            result ^= b
-            for _ in range(32):
-                if result & 0x80000000 == 0:
-                    result = (result << 1) & 0xFFFFFFFF
-                else:
-                    result = ((result << 1) ^ 0x04C11DB7) & 0xFFFFFFFF
-        return result & 0xFF
+    _checksum = staticmethod(crc.checksum)
 
     @staticmethod
     def _setup_types(libusb):
@@ -256,6 +687,12 @@ class Usb:
         libusb.libusb_get_configuration.argtypes = [c_voidp, c_voidp]
         libusb.libusb_get_device_descriptor.restype = LibusbResult
         libusb.libusb_get_device_descriptor.argtypes = [c_voidp, c_voidp]
+        libusb.libusb_get_bus_number.restype = c_uint8
+        libusb.libusb_get_bus_number.argtypes = [c_voidp]
+        libusb.libusb_get_device_address.restype = c_uint8
+        libusb.libusb_get_device_address.argtypes = [c_voidp]
+        libusb.libusb_get_port_numbers.restype = c_int
+        libusb.libusb_get_port_numbers.argtypes = [c_voidp, POINTER(c_uint8), c_int]
         libusb.libusb_open.restype = LibusbResult
         libusb.libusb_open.argtypes = [c_voidp, c_voidp]
         libusb.libusb_close.restype = None
@@ -268,6 +705,33 @@ class Usb:
         libusb.libusb_release_interface.argtypes = [c_voidp, c_int]
         libusb.libusb_detach_kernel_driver.restype = LibusbResult
         libusb.libusb_detach_kernel_driver.argtypes = [c_voidp, c_int]
+        libusb.libusb_alloc_transfer.restype = POINTER(Transfer)
+        libusb.libusb_alloc_transfer.argtypes = [c_int]
+        libusb.libusb_free_transfer.restype = None
+        libusb.libusb_free_transfer.argtypes = [POINTER(Transfer)]
+        libusb.libusb_submit_transfer.restype = LibusbResult
+        libusb.libusb_submit_transfer.argtypes = [POINTER(Transfer)]
+        # Fails harmlessly for transfers that already completed.
+        libusb.libusb_cancel_transfer.restype = c_int
+        libusb.libusb_cancel_transfer.argtypes = [POINTER(Transfer)]
+        libusb.libusb_handle_events_timeout.restype = LibusbResult
+        libusb.libusb_handle_events_timeout.argtypes = [c_voidp, POINTER(Timeval)]
+        libusb.libusb_has_capability.restype = c_int
+        libusb.libusb_has_capability.argtypes = [c_uint32]
+        libusb.libusb_hotplug_register_callback.restype = LibusbResult
+        libusb.libusb_hotplug_register_callback.argtypes = [
+            c_voidp,
+            c_int,
+            c_int,
+            c_int,
+            c_int,
+            c_int,
+            HotplugCallback,
+            c_voidp,
+            POINTER(c_int),
+        ]
+        libusb.libusb_hotplug_deregister_callback.restype = None
+        libusb.libusb_hotplug_deregister_callback.argtypes = [c_voidp, c_int]
         libusb.libusb_bulk_transfer.restype = LibusbResult
         libusb.libusb_bulk_transfer.argtypes = [
             c_voidp,
@@ -277,3 +741,185 @@ class Usb:
             POINTER(c_int),
             c_uint,
         ]
+
+
+@functools.cache
+def _load_libusb() -> CDLL:
+    if sys.platform == 'win32':
+        libusb = CDLL(os.path.dirname(__file__) + '\\libusb-1.0.dll')
+    else:
+        libusb = CDLL('libusb-1.0.so.0')
+    Usb._setup_types(libusb)
+    return libusb
+
+
+class _SharedContext:
+    """The libusb context used to enumerate pads and watch for hotplug events.
+
+    Created on first use and exited when the last user releases it, so that
+    a program that never enumerates does not initialise libusb for it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._context = c_void_p()
+        self._users = 0
+
+    def acquire(self) -> c_void_p:
+        with self._lock:
+            if not self._users:
+                _load_libusb().libusb_init(pointer(self._context))
+            self._users += 1
+            return self._context
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            if not self._users:
+                _load_libusb().libusb_exit(self._context)
+                self._context = c_void_p()
+
+    @contextlib.contextmanager
+    def use(self) -> Iterator[c_void_p]:
+        context = self.acquire()
+        try:
+            yield context
+        finally:
+            self.release()
+
+
+_shared_context = _SharedContext()
+
+
+def enumerate_pads() -> list[DeviceId]:
+    """Returns all connected pads."""
+    return list(pad_ports())
+
+
+def pad_ports() -> dict[DeviceId, tuple[int, ...]]:
+    """Returns all connected pads with their port paths."""
+    libusb = _load_libusb()
+    device_list = POINTER(c_voidp)()
+    with _shared_context.use() as context:
+        num_devices = libusb.libusb_get_device_list(context, pointer(device_list))
+        if num_devices < 0:
+            raise OtherError('Error enumerating devices.')
+        try:
+            return {
+                _device_id(libusb, device_list[i]): _port_path(libusb, device_list[i])
+                for i in range(num_devices)
+                if _is_pad(libusb, device_list[i])
+            }
+        finally:
+            libusb.libusb_free_device_list(device_list, 1)
+
+
+def _is_pad(libusb: CDLL, device) -> bool:
+    descriptor = DeviceDescriptor()
+    libusb.libusb_get_device_descriptor(device, pointer(descriptor))
+    return descriptor.idVendor == Usb.VENDOR_ID and descriptor.idProduct == Usb.PRODUCT_ID
+
+
+def _device_id(libusb: CDLL, device) -> DeviceId:
+    return DeviceId(libusb.libusb_get_bus_number(device), libusb.libusb_get_device_address(device))
+
+
+def _port_path(libusb: CDLL, device) -> tuple[int, ...]:
+    # Unlike the address, stays the same when the pad is replugged.
+    ports = (c_uint8 * 7)()
+    count = libusb.libusb_get_port_numbers(device, ports, len(ports))
+    return (libusb.libusb_get_bus_number(device), *ports[: max(0, count)])
+
+
+class Hotplug:
+    """Reports pads being plugged in and unplugged, from a thread of its own.
+
+    Uses libusb hotplug events where libusb supports them, otherwise
+    enumerates the devices every SCAN_INTERVAL. Pads that are already
+    plugged in when it starts are not reported.
+    """
+
+    CAP_HAS_HOTPLUG = 0x0101
+    EVENT_ARRIVED = 0x01
+    EVENT_LEFT = 0x02
+    MATCH_ANY = -1
+    SCAN_INTERVAL = timedelta(seconds=1)
+    STOP_LATENCY = timedelta(milliseconds=100)
+
+    def __init__(
+        self,
+        arrived: Callable[[DeviceId, tuple[int, ...]], None],
+        left: Callable[[DeviceId], None],
+    ):
+        self._libusb = _load_libusb()
+        self._arrived = arrived
+        self._left = left
+        self._callback = HotplugCallback(self._on_hotplug)
+        self._stop = threading.Event()
+        self._context = c_void_p()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def has_hotplug(self) -> bool:
+        return bool(self._libusb.libusb_has_capability(self.CAP_HAS_HOTPLUG))
+
+    def start(self):
+        target = self._watch if self.has_hotplug else self._scan
+        # Held while running, so that enumerating meanwhile reuses it.
+        self._context = _shared_context.acquire()
+        self._stop.clear()
+        self._thread = threading.Thread(target=target, name='Hotplug', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            _shared_context.release()
+
+    def _watch(self):
+        context = self._context
+        handle = c_int()
+        try:
+            self._libusb.libusb_hotplug_register_callback(
+                context,
+                self.EVENT_ARRIVED | self.EVENT_LEFT,
+                0,
+                Usb.VENDOR_ID,
+                Usb.PRODUCT_ID,
+                self.MATCH_ANY,
+                self._callback,
+                None,
+                pointer(handle),
+            )
+            seconds = self.STOP_LATENCY.total_seconds()
+            tv = Timeval(0, int(1e6 * seconds))
+            while not self._stop.is_set():
+                self._libusb.libusb_handle_events_timeout(context, pointer(tv))
+            self._libusb.libusb_hotplug_deregister_callback(context, handle)
+        except Error:
+            self._scan()
+
+    def _on_hotplug(self, context, device, event, user_data) -> int:
+        # Runs inside libusb_handle_events_timeout, where the device must not
+        # be opened. Returning 0 keeps the callback registered.
+        device_id = _device_id(self._libusb, device)
+        if event == self.EVENT_ARRIVED:
+            self._arrived(device_id, _port_path(self._libusb, device))
+        elif event == self.EVENT_LEFT:
+            self._left(device_id)
+        return 0
+
+    def _scan(self):
+        known = pad_ports()
+        while not self._stop.wait(self.SCAN_INTERVAL.total_seconds()):
+            try:
+                current = pad_ports()
+            except Error:
+                continue
+            for device_id in known.keys() - current.keys():
+                self._left(device_id)
+            for device_id in current.keys() - known.keys():
+                self._arrived(device_id, current[device_id])
+            known = current
@@ -1,8 +1,12 @@
 import functools
+import itertools
+import time
 from typing import Any, Callable, TypeVar
 
 from PySide6.QtCore import QObject, QTimer, Slot
 
+from metrics import Metrics
+
 _T = TypeVar('_T')
 
 
@@ -15,19 +19,50 @@ def throttle_key(key_selector: Callable):
 
 
 class _Throttle(QObject):
-    _queue: list[tuple[Callable, Any, list[Any]]]
+    """Queues calls to the slots of `target` and makes them in batches.
+
+    Calls to a slot with a `throttle_key` replace the queued call with the
+    same slot and key, last write wins, and keep its place in the queue.
+    Calls to other slots are made as queued and are barriers: no later call
+    is merged into a call queued before them, so dependent operations, like
+    moving a curve point after adding one, keep their order.
+
+    The window and batch size follow the recent round trips in `metrics`.
+    Calls beyond a batch wait for the next window, where newer values may
+    replace them, so polls run in between and a slow link is not flooded.
+    """
+
+    # Window before the first round trip is measured.
+    DEFAULT_WINDOW_MS = 10
+    MIN_WINDOW_MS = 2
+    MAX_WINDOW_MS = 50
 
-    def __init__(self, target: QObject, parent: QObject | None = None):
+    _queue: dict[tuple[Callable, Any, int], list[Any]]
+
+    def __init__(
+        self, target: QObject, metrics: Metrics | None = None, parent: QObject | None = None
+    ):
         super().__init__(parent)
-        self._queue = []
+        self._queue = {}
+        # Incremented by every barrier, keeps calls on either side apart.
+        self._epoch = 0
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics.window_ms = self.DEFAULT_WINDOW_MS
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._process_queue)
 
         def make_slot_wrapper(slot):
             if hasattr(slot, '_throttle_key'):
 
                 @functools.wraps(slot)
                 def wrapper(*args):
-                    self._queue.append((slot, slot._throttle_key(*args), list(args)))
-                    QTimer.singleShot(10, self._process_queue)
+                    queue_key = (slot, slot._throttle_key(*args), self._epoch)
+                    # Replaced in place, so edits of different keys stay in order.
+                    if queue_key in self._queue:
+                        self.metrics.coalesced += 1
+                    self._queue[queue_key] = list(args)
+                    self._schedule()
 
                 return wrapper
 
@@ -35,8 +70,9 @@ class _Throttle(QObject):
 
                 @functools.wraps(slot)
                 def wrapper(*args):
-                    self._queue.append((slot, None, list(args)))
-                    QTimer.singleShot(10, self._process_queue)
+                    self._queue[(slot, None, self._epoch)] = list(args)
+                    self._epoch += 1
+                    self._schedule()
 
                 return wrapper
 
@@ -49,13 +85,68 @@ class _Throttle(QObject):
 
         self.moveToThread(target.thread())
 
+    def _schedule(self):
+        if not self._timer.isActive():
+            self._adapt()
+            self._timer.start(self.metrics.window_ms)
+
+    def _adapt(self):
+        # Writes take at most half of the link time in a window of about
+        # eight round trips, the polls get the rest.
+        round_trip_ms = self.metrics.recent_ns / 1e6
+        if not round_trip_ms:
+            return
+        window_ms = min(self.MAX_WINDOW_MS, max(self.MIN_WINDOW_MS, round(8 * round_trip_ms)))
+        self.metrics.window_ms = window_ms
+        self.metrics.batch = max(1, int(window_ms / (2 * round_trip_ms)))
+
     @Slot()
     def _process_queue(self):
-        queue, self._queue = self._queue, []
-        for i, (slot, key, args) in enumerate(queue):
-            if i + 1 >= len(queue) or queue[i + 1][1] != key:
-                slot(*args)
-
-
-def Throttle[_T: QObject](target: _T) -> _T:
-    return _Throttle(target)  # pyright: ignore[reportReturnType]
+        batch = self.metrics.batch
+        if batch and len(self._queue) > batch:
+            calls = list(itertools.islice(self._queue.items(), batch))
+            for queue_key, _ in calls:
+                del self._queue[queue_key]
+            self._schedule()
+        else:
+            calls, self._queue = self._queue.items(), {}
+        self.metrics.dispatched += len(calls)
+        for (slot, _, _), args in calls:
+            slot(*args)
+
+
+def Throttle[_T: QObject](target: _T, metrics: Metrics | None = None) -> _T:
+    return _Throttle(target, metrics)  # pyright: ignore[reportReturnType]
+
+
+class SampleClock:
+    """Decimates a stream of samples to the display rate and measures its rate."""
+
+    def __init__(self, display_interval: float = 1 / 60, report_interval: float = 1.0):
+        self._display_interval = display_interval
+        self._report_interval = report_interval
+        self._next_display = 0.0
+        self._report_start = time.monotonic()
+        self._samples = 0
+        self.dropped = 0
+
+    def sample(self, now: float, count: int = 1) -> bool:
+        """Counts samples, returns True if they should be displayed."""
+        self._samples += count
+        if now >= self._next_display:
+            self._next_display = now + self._display_interval
+            return True
+        return False
+
+    def drop(self, count: int = 1):
+        self.dropped += count
+
+    def report(self, now: float) -> tuple[float, int] | None:
+        """Returns the sample rate and dropped sample count once per report interval."""
+        elapsed = now - self._report_start
+        if elapsed < self._report_interval:
+            return None
+        rate = self._samples / elapsed
+        self._samples = 0
+        self._report_start = now
+        return rate, self.dropped